@@ -0,0 +1,118 @@
+"""
+Benchmark multi-dialogue batching: agreement with single-dialogue scoring and input tokens per dialogue
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from models.base import CRITERIA, BaseCSATModel, Prompt
+from models.ratelimit import estimate_tokens
+from pipeline import CSATPipeline, CSATResult
+from registry import REGISTRY, iter_dialogues
+from run import get_models, model_configs
+from sampling import sample_dialogues
+
+MODEL_CHOICES = ['chatgpt', 'gemini', 'qwen', 'mistral']
+
+
+class PromptOnlyModel(BaseCSATModel):
+    """A model's prompts and budgets without a provider client, for estimates that need no API key"""
+
+    def _initialize_model(self):
+        self.model_version = self.config.get('model_version')
+
+    def _generate_response(self, prompt: Prompt) -> str:
+        raise RuntimeError(f"{self.model_name} was built for prompt estimates only; it has no client")
+
+
+def estimated_tokens_per_dialogue(pipeline: CSATPipeline, dialogues: List, batch_size: int) -> float:
+    """Estimated prompt tokens per dialogue for one iteration at `batch_size`, without calling the model"""
+    inputs = [pipeline._csat_input(dialogue, "") for dialogue in dialogues]
+    total = 0
+    for start in range(0, len(inputs), batch_size):
+        group = inputs[start:start + batch_size]
+        if len(group) == 1:
+            prompt = pipeline.model._construct_prompt(group[0])
+        else:
+            prompt = pipeline.model._construct_batch_prompt(group)
+        total += estimate_tokens(prompt.text)
+    return total / len(inputs)
+
+
+def score(pipeline: CSATPipeline, dialogues: List, batch_size: int) -> List[CSATResult]:
+    if batch_size == 1:
+        return [pipeline.evaluate_dialogue(dialogue, "") for dialogue in dialogues]
+    results = []
+    for start in range(0, len(dialogues), batch_size):
+        results.extend(pipeline.evaluate_batch(dialogues[start:start + batch_size], ""))
+    return results
+
+
+def agreement(single: List[CSATResult], batched: List[CSATResult]):
+    """(OverallExperience MAE, mean per-criterion MAE, OverallExperience correlation), 0-100 scale"""
+    criteria_mae = []
+    for attr in CRITERIA.values():
+        a = np.array([getattr(r, f'{attr}_avg') for r in single])
+        b = np.array([getattr(r, f'{attr}_avg') for r in batched])
+        criteria_mae.append(float(np.mean(np.abs(a - b))))
+    a = np.array([r.overall_experience_avg for r in single])
+    b = np.array([r.overall_experience_avg for r in batched])
+    correlation = float(np.corrcoef(a, b)[0, 1]) if len(a) > 1 and a.std() and b.std() else float('nan')
+    return float(np.mean(np.abs(a - b))), float(np.mean(criteria_mae)), correlation
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scoring several dialogues per request')
+    parser.add_argument('--model', choices=MODEL_CHOICES, default='qwen', help='Model to benchmark (default: qwen)')
+    parser.add_argument('--dataset', choices=list(REGISTRY), default='CCPE', help='Dataset (default: CCPE)')
+    parser.add_argument('--sample-size', type=int, default=24, help='Dialogues scored (default: 24)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for dialogue sampling (default: 42)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[2, 4, 8],
+                        help='Dialogues per request to compare against 1 (default: 2 4 8)')
+    parser.add_argument('--iterations', type=int, default=1, help='Iterations per dialogue (default: 1)')
+    parser.add_argument('--estimate-only', action='store_true',
+                        help='Only report estimated prompt tokens per dialogue; no model calls')
+    args = parser.parse_args()
+
+    if args.estimate_only:
+        # Prompts depend only on the config, so no client (or API key) is needed
+        _, model_name, config = model_configs()[args.model]
+        model = PromptOnlyModel(model_name, config)
+    else:
+        try:
+            model = get_models([args.model])[0]
+        except RuntimeError as e:
+            parser.error(f"Could not initialize {args.model}: {e} (use --estimate-only to run without one)")
+    pipeline = CSATPipeline(model, args.iterations)
+    dialogues = sample_dialogues(iter_dialogues(args.dataset), args.sample_size, 'reservoir', args.seed)
+    print(f"{model.model_name} on {args.dataset}: {len(dialogues)} dialogues, {args.iterations} iteration(s)")
+
+    batch_sizes = [1] + sorted(set(args.batch_sizes) - {1})
+    if args.estimate_only:
+        print(f"{'K':>4} {'Est. tokens/dlg':>16}")
+        for batch_size in batch_sizes:
+            print(f"{batch_size:>4} {estimated_tokens_per_dialogue(pipeline, dialogues, batch_size):>16.0f}")
+        return
+
+    print(f"{'K':>4} {'Est. tokens/dlg':>16} {'Billed tokens/dlg':>18} {'Time (s)':>9} {'Fallbacks':>10} "
+          f"{'Overall MAE':>12} {'Criteria MAE':>13} {'Corr':>6}")
+    single = None
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        results = score(pipeline, dialogues, batch_size)
+        elapsed = time.perf_counter() - start
+        billed = sum(r.prompt_tokens for r in results) / len(results) / args.iterations
+        fallbacks = sum(r.batch_fallbacks for r in results)
+        if single is None:
+            single = results
+        overall_mae, criteria_mae, correlation = agreement(single, results)
+        print(f"{batch_size:>4} {estimated_tokens_per_dialogue(pipeline, dialogues, batch_size):>16.0f} "
+              f"{billed:>18.0f} {elapsed:>9.1f} {fallbacks:>10} "
+              f"{overall_mae:>12.2f} {criteria_mae:>13.2f} {correlation:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark serial vs multiprocess dataset parsing against worker count
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from dataloader import DatasetParser, Language
+
+
+def build_corpus(source: Path, repeat: int, directory: str) -> Path:
+    """Concatenate a dataset `repeat` times to stand in for a large export"""
+    corpus = Path(directory) / f'{source.stem}_x{repeat}.txt'
+    with open(corpus, 'wb') as out:
+        for _ in range(repeat):
+            with open(source, 'rb') as f:
+                shutil.copyfileobj(f, out)
+            out.write(b'\n\n')
+    return corpus
+
+
+def time_parse(parser: DatasetParser, corpus: Path, language: Language, workers: int, runs: int):
+    """Best-of-`runs` wall time and the parsed dialogues"""
+    best, dialogues = float('inf'), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        dialogues = parser.parse_file(str(corpus), language, workers)
+        best = min(best, time.perf_counter() - start)
+    return best, dialogues
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel dataset parsing')
+    parser.add_argument('--dataset', default='MWOZ', help='Dataset under dataset/ (default: MWOZ)')
+    parser.add_argument('--repeat', type=int, default=20, help='Copies of the dataset in the corpus (default: 20)')
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='Worker counts to try (default: 1, 2, 4, ... up to the core count)')
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per setting, best kept (default: 3)')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, cores} | {2 ** i for i in range(1, cores.bit_length()) if 2 ** i <= cores})
+    language = Language.CHINESE if args.dataset == 'JDDC' else Language.ENGLISH
+    source = Path(__file__).parent / 'dataset' / f'{args.dataset}.txt'
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = build_corpus(source, args.repeat, directory)
+        print(f"Corpus: {args.dataset} x{args.repeat} ({corpus.stat().st_size / 1024 / 1024:.1f} MB), {cores} cores")
+
+        dataset_parser = DatasetParser()
+        serial_time, serial = time_parse(dataset_parser, corpus, language, 1, args.runs)
+        print(f"{'Workers':>8} {'Time (s)':>10} {'Speedup':>8}  Identical")
+        print(f"{1:>8} {serial_time:>10.3f} {1.0:>8.2f}  -")
+        for workers in workers_list:
+            if workers == 1:
+                continue
+            elapsed, dialogues = time_parse(dataset_parser, corpus, language, workers, args.runs)
+            print(f"{workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>8.2f}  {dialogues == serial}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Append-only run journal for checkpointing and resuming long experiments
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from models.base import ModelResponse
+
+
+def dialogue_fingerprint(dialogue) -> str:
+    """Short hash of a dialogue's text, to check journal entries still match the sample"""
+    return hashlib.sha256(dialogue.to_text().encode('utf-8')).hexdigest()[:16]
+
+
+class DialogueCheckpoint:
+    """Journaled iterations of one (model, dataset, dialogue)"""
+
+    def __init__(self, journal: 'RunJournal', key: Tuple[str, str, int, str], responses: Dict[int, ModelResponse]):
+        self.journal = journal
+        self.key = key
+        self.responses = responses
+
+    def record(self, iteration: int, response: ModelResponse):
+        self.responses[iteration] = response
+        model_name, dataset, dialogue_id, fingerprint = self.key
+        self.journal._append({
+            'type': 'iteration',
+            'model': model_name,
+            'dataset': dataset,
+            'dialogue_id': dialogue_id,
+            'fingerprint': fingerprint,
+            'iteration': iteration,
+            'retries': response.retries,
+            'text': response.text
+        })
+
+
+class RunJournal:
+    """JSONL journal of completed iterations and dialogues, written as the run goes.
+
+    A crash can leave a truncated last line; it is ignored on load and
+    terminated before appending, so at most the iteration being written is lost.
+    """
+
+    FILENAME = 'journal.jsonl'
+    CONFIG_FILENAME = 'run_config.json'
+
+    def __init__(self, run_dir: str):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.run_dir / self.FILENAME
+        self._iterations: Dict[Tuple[str, str, int, str], Dict[int, ModelResponse]] = {}
+        self._dialogues: Dict[Tuple[str, str, int, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._ends_mid_line():
+            # Keep new entries off the truncated line, which would otherwise swallow the first of them
+            self._file.write('\n')
+            self._file.flush()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = (entry['model'], entry['dataset'], entry['dialogue_id'], entry['fingerprint'])
+                if entry['type'] == 'iteration':
+                    self._iterations.setdefault(key, {})[entry['iteration']] = ModelResponse(
+                        text=entry['text'], retries=entry.get('retries', 0)
+                    )
+                elif entry['type'] == 'dialogue':
+                    self._dialogues[key] = entry['result']
+
+    def _ends_mid_line(self) -> bool:
+        with open(self.path, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                return False
+            f.seek(-1, 2)
+            return f.read(1) != b'\n'
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            if self._file.closed:
+                return  # Closed on interrupt while a worker was finishing
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    @property
+    def completed_dialogues(self) -> int:
+        return len(self._dialogues)
+
+    def dialogue_result(self, model_name: str, dataset: str, dialogue_id: int,
+                        fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Journaled result of a finished dialogue, as saved by record_dialogue"""
+        return self._dialogues.get((model_name, dataset, dialogue_id, fingerprint))
+
+    def checkpoint(self, model_name: str, dataset: str, dialogue_id: int, fingerprint: str) -> DialogueCheckpoint:
+        key = (model_name, dataset, dialogue_id, fingerprint)
+        return DialogueCheckpoint(self, key, dict(self._iterations.get(key, {})))
+
+    def record_dialogue(self, model_name: str, dataset: str, dialogue_id: int, fingerprint: str,
+                        result: Dict[str, Any]):
+        self._dialogues[(model_name, dataset, dialogue_id, fingerprint)] = result
+        self._append({
+            'type': 'dialogue',
+            'model': model_name,
+            'dataset': dataset,
+            'dialogue_id': dialogue_id,
+            'fingerprint': fingerprint,
+            'result': result
+        })
+
+    def save_config(self, config: Dict[str, Any]):
+        with open(self.run_dir / self.CONFIG_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+
+    def load_config(self) -> Dict[str, Any]:
+        with open(self.run_dir / self.CONFIG_FILENAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
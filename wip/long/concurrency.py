@@ -0,0 +1,84 @@
+"""
+Concurrency primitives shared by the evaluation pipeline
+"""
+
+import threading
+from typing import Optional
+
+
+class InFlightLimiter:
+    """Cap the number of model requests in flight across all workers"""
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("In-flight limit must be at least 1")
+        self.limit = limit
+        self.max_limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+        return False
+
+    def record(self, latency: Optional[float], throttled: bool = False):
+        """Feedback from a finished request; a fixed limit ignores it"""
+
+
+class AdaptiveLimiter(InFlightLimiter):
+    """AIMD in-flight limit driven by request latency and rate-limit feedback.
+
+    The limit grows by one after a full window of healthy requests and is
+    cut by `decrease_factor` on a throttled request or a latency spike
+    (latency above `latency_tolerance` times the smoothed baseline).
+    """
+
+    def __init__(self, max_limit: int, initial_limit: Optional[int] = None, min_limit: int = 1,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0, smoothing: float = 0.1):
+        super().__init__(initial_limit or min(max_limit, 2))
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.baseline_latency = None
+        self._healthy = 0
+        self._cooldown = 0
+
+    def record(self, latency: Optional[float], throttled: bool = False):
+        with self._condition:
+            spike = (latency is not None and self.baseline_latency is not None
+                     and latency > self.latency_tolerance * self.baseline_latency)
+
+            # Spikes feed the baseline too, so a lasting shift in latency is absorbed
+            if latency is not None:
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency += self.smoothing * (latency - self.baseline_latency)
+
+            if throttled or spike:
+                # Requests already in flight were sent under the old limit; let them drain
+                if self._cooldown == 0:
+                    self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+                    self._cooldown = self.in_flight
+                    self._healthy = 0
+                else:
+                    self._cooldown -= 1
+                return
+
+            self._cooldown = max(0, self._cooldown - 1)
+            self._healthy += 1
+            if self._healthy >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._healthy = 0
+                self._condition.notify_all()
@@ -2,11 +2,22 @@
 Data loading and parsing utilities for CSAT evaluation datasets
 """
 
+from array import array
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from enum import Enum
 import numpy as np
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import pickle
 import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
@@ -20,41 +31,125 @@ class Speaker(Enum):
     SYSTEM = "SYSTEM"
 
 
-@dataclass
 class Utterance:
-    """Single utterance in dialogue"""
-    speaker: Speaker
-    text: str
-    action: Optional[str]
-    satisfaction_scores: List[int]
+    """Single utterance in dialogue.
+
+    Scores live in a bytes buffer (signed int8) shared by the whole dialogue;
+    each utterance only keeps its slice bounds. Action labels are interned, since a corpus
+    repeats a small set of them.
+    """
+    __slots__ = ('speaker', 'text', 'action', '_scores', '_start', '_end')
+    
+    def __init__(self, speaker: Speaker, text: str, action: Optional[str], satisfaction_scores: List[int]):
+        self.speaker = speaker
+        self.text = text
+        self.action = sys.intern(action) if action else action
+        # A plain list until a Dialogue packs it into the shared array
+        self._scores = satisfaction_scores
+        self._start = 0
+        self._end = len(satisfaction_scores)
+    
+    @property
+    def satisfaction_scores(self) -> List[int]:
+        if isinstance(self._scores, bytes):
+            return _int8_scores(self._scores, self._start, self._end)
+        return list(self._scores[self._start:self._end])
+    
+    def _share_scores(self, scores: bytes, start: int):
+        """Point this utterance at its slice of the dialogue's shared score buffer"""
+        self._end = start + (self._end - self._start)
+        self._start = start
+        self._scores = scores
+    
+    def __eq__(self, other):
+        if not isinstance(other, Utterance):
+            return NotImplemented
+        return (self.speaker, self.text, self.action, self.satisfaction_scores) == \
+            (other.speaker, other.text, other.action, other.satisfaction_scores)
+    
+    def __repr__(self):
+        return (f"Utterance(speaker={self.speaker}, text={self.text!r}, action={self.action!r}, "
+                f"satisfaction_scores={self.satisfaction_scores})")
     
 
-@dataclass
+# Scores are stored as int8
+SCORE_MIN, SCORE_MAX = -128, 127
+
+
+def _int8_scores(buffer: bytes, start: int = 0, end: Optional[int] = None) -> List[int]:
+    """Scores in buffer[start:end], read as signed int8"""
+    return memoryview(buffer).cast('b')[start:end].tolist()
+
+
 class Dialogue:
-    """Complete dialogue session"""
-    utterances: List[Utterance]
-    overall_satisfaction: Optional[List[int]]
-    explanations: Optional[List[str]]  # For JDDC dialogue-level explanations
-    language: Language
+    """Complete dialogue session.
+
+    Utterance and OVERALL scores are packed into one bytes buffer of int8 values
+    (a plain bytes object costs ~33 bytes of overhead, a NumPy array ~110); the
+    average satisfaction and transcript text are computed once and cached.
+    """
+    __slots__ = ('utterances', 'explanations', 'language', 'dialogue_id', 'scores', '_overall_start',
+                 '_average', '_text')
+    
+    def __init__(self, utterances: List[Utterance], overall_satisfaction: Optional[List[int]],
+                 explanations: Optional[List[str]], language: Language, dialogue_id: Optional[int] = None):
+        self.utterances = utterances
+        self.explanations = explanations  # For JDDC dialogue-level explanations
+        self.language = language
+        self.dialogue_id = dialogue_id  # Source id where the format has one (JSON); TXT uses file order
+        
+        flat = [score for utt in utterances for score in utt._scores[utt._start:utt._end]]
+        self._overall_start = None
+        if overall_satisfaction is not None:
+            self._overall_start = len(flat)
+            flat.extend(overall_satisfaction)
+        invalid = [score for score in flat if not SCORE_MIN <= score <= SCORE_MAX]
+        if invalid:
+            name = dialogue_id if dialogue_id is not None else repr(utterances[0].text[:40]) if utterances else '?'
+            raise ValueError(f"Dialogue {name}: satisfaction scores {invalid} outside {SCORE_MIN}..{SCORE_MAX}")
+        self.scores = array('b', flat).tobytes()
+        start = 0
+        for utt in utterances:
+            length = utt._end - utt._start
+            utt._share_scores(self.scores, start)
+            start += length
+        self._average = None
+        self._text = None
+    
+    @property
+    def overall_satisfaction(self) -> Optional[List[int]]:
+        if self._overall_start is None:
+            return None
+        return _int8_scores(self.scores, self._overall_start)
     
     @property
     def average_satisfaction(self) -> float:
         """Calculate average satisfaction score from OVERALL line (1-5 scale)"""
-        if self.overall_satisfaction:
-            return float(np.mean(self.overall_satisfaction))  # Keep original 1-5 scale
-        # Fallback: Calculate from utterance-level scores
-        all_scores = []
-        for utt in self.utterances:
-            if utt.satisfaction_scores:
-                all_scores.extend(utt.satisfaction_scores)
-        return float(np.mean(all_scores)) if all_scores else 3.0
+        if self._average is None:
+            if self._overall_start is not None and self._overall_start < len(self.scores):
+                overall = _int8_scores(self.scores, self._overall_start)
+                self._average = sum(overall) / len(overall)  # Keep original 1-5 scale
+            else:
+                # Fallback: Calculate from utterance-level scores
+                utterance_scores = _int8_scores(self.scores, 0, self._overall_start)
+                self._average = sum(utterance_scores) / len(utterance_scores) if utterance_scores else 3.0
+        return self._average
     
     def to_text(self) -> str:
         """Convert dialogue to text format"""
-        lines = []
-        for utt in self.utterances:
-            lines.append(f"{utt.speaker.value}: {utt.text}")
-        return "\n".join(lines)
+        if self._text is None:
+            self._text = "\n".join(f"{utt.speaker.value}: {utt.text}" for utt in self.utterances)
+        return self._text
+    
+    def __eq__(self, other):
+        if not isinstance(other, Dialogue):
+            return NotImplemented
+        return (self.dialogue_id, self.utterances, self.overall_satisfaction, self.explanations, self.language) == \
+            (other.dialogue_id, other.utterances, other.overall_satisfaction, other.explanations, other.language)
+    
+    def __repr__(self):
+        return (f"Dialogue(utterances=[{len(self.utterances)} utterances], "
+                f"overall_satisfaction={self.overall_satisfaction}, language={self.language})")
 
 
 class ActionMapper:
@@ -106,35 +201,119 @@ class ActionMapper:
         return self.action_to_category.get(action, "OTHER")
 
 
+# Compressed dataset suffixes, decompressed while streaming
+COMPRESSED_SUFFIXES = ('.gz', '.zst', '.xz')
+
+
+def is_compressed(filepath) -> bool:
+    return Path(filepath).suffix in COMPRESSED_SUFFIXES
+
+
+def open_text(filepath) -> io.TextIOBase:
+    """Open a dataset file for reading text, decompressing .gz, .zst and .xz on the fly"""
+    suffix = Path(filepath).suffix
+    if suffix == '.gz':
+        return gzip.open(filepath, 'rt', encoding='utf-8')
+    if suffix == '.xz':
+        return lzma.open(filepath, 'rt', encoding='utf-8')
+    if suffix == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard library not found. Install with: pip install zstandard")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+        return io.TextIOWrapper(io.BufferedReader(raw), encoding='utf-8')
+    return open(filepath, 'r', encoding='utf-8')
+
+
+# A parsed session as plain data: ([(speaker, text, action, scores)], overall scores, explanations).
+# Process pool workers return these, which pickle far faster than Dialogue objects.
+SessionRecord = Tuple[List[Tuple[str, str, Optional[str], List[int]]], Optional[List[int]], Optional[List[str]]]
+
+SPEAKERS = {speaker.value: speaker for speaker in Speaker}
+
+
 class DatasetParser:
     """Parse JDDC, MWOZ, and CCPE dataset formats"""
     
     def __init__(self):
         self.action_mapper = ActionMapper()
     
-    def parse_file(self, filepath: str, language: Language) -> List[Dialogue]:
-        """Parse dataset file into Dialogue objects"""
-        dialogues = []
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Split by double newlines to get sessions
-        sessions = content.strip().split('\n\n')
-        
-        for session in sessions:
-            if not session.strip():
-                continue
-                
-            dialogue = self._parse_session(session, language)
-            if dialogue:
-                dialogues.append(dialogue)
-        
-        return dialogues
+    def parse_file(self, filepath: str, language: Language, workers: Optional[int] = None) -> List[Dialogue]:
+        """Parse dataset file into Dialogue objects, in a process pool when workers > 1"""
+        # Compressed streams cannot be split at byte offsets; they are parsed while decompressing
+        if workers and workers > 1 and not is_compressed(filepath):
+            return self.parse_file_parallel(filepath, language, workers)
+        return list(self.iter_file(filepath, language))
+    
+    def iter_file(self, filepath: str, language: Language) -> Iterator[Dialogue]:
+        """Stream Dialogue objects from a dataset file (optionally compressed), one session at a time"""
+        with open_text(filepath) as f:
+            for session_lines in self._group_sessions(line.rstrip('\n') for line in f):
+                dialogue = self._parse_lines(session_lines, language)
+                if dialogue:
+                    yield dialogue
+    
+    def parse_file_parallel(self, filepath: str, language: Language, workers: Optional[int] = None,
+                            chunks_per_worker: int = 4) -> List[Dialogue]:
+        """Parse chunks of the file (split at blank lines) in a process pool.
+
+        Workers return SessionRecords and the Dialogue objects are built here;
+        chunks are merged in file order, so the result is identical to parse_file.
+        """
+        workers = workers or os.cpu_count() or 1
+        boundaries = self._chunk_boundaries(filepath, workers * chunks_per_worker)
+        tasks = [(str(filepath), start, end, language) for start, end in zip(boundaries, boundaries[1:])]
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)) or 1) as executor:
+            return [self._build_dialogue(record, language)
+                    for chunk in executor.map(_parse_chunk, tasks) for record in chunk]
+    
+    @staticmethod
+    def _group_sessions(lines: Iterable[str]) -> Iterator[List[str]]:
+        """Group lines (without newlines) into sessions; a blank line ends a session"""
+        session_lines = []
+        for line in lines:
+            if line:
+                session_lines.append(line)
+            elif session_lines:
+                yield session_lines
+                session_lines = []
+        if session_lines:
+            yield session_lines
+    
+    @staticmethod
+    def _chunk_boundaries(filepath: str, n_chunks: int) -> List[int]:
+        """Byte offsets splitting the file into about n_chunks pieces, each cut just after a blank line"""
+        size = os.path.getsize(filepath)
+        boundaries = [0]
+        with open(filepath, 'rb') as f:
+            for i in range(1, n_chunks):
+                target = max(size * i // n_chunks, boundaries[-1])
+                f.seek(target)
+                f.readline()  # Skip the rest of the line the target falls in
+                while True:
+                    line = f.readline()
+                    if not line or not line.rstrip(b'\r\n'):
+                        break
+                position = f.tell()
+                if position >= size:
+                    break
+                if position > boundaries[-1]:
+                    boundaries.append(position)
+        boundaries.append(size)
+        return boundaries
     
     def _parse_session(self, session_text: str, language: Language) -> Optional[Dialogue]:
         """Parse a single session"""
-        lines = session_text.strip().split('\n')
+        return self._parse_lines(session_text.strip().split('\n'), language)
+    
+    def _parse_lines(self, lines: List[str], language: Language) -> Optional[Dialogue]:
+        """Parse the lines of a single session"""
+        record = self._parse_record(lines, language)
+        return self._build_dialogue(record, language) if record else None
+    
+    def _parse_record(self, lines: List[str], language: Language) -> Optional[SessionRecord]:
+        """Fields of a single session as plain tuples, or None if it has no utterances"""
         utterances = []
         overall_satisfaction = None
         explanations = None
@@ -160,6 +339,8 @@ class DatasetParser:
             # Parse regular utterance
             if len(parts) >= 2:
                 speaker_str = parts[0].strip()
+                if speaker_str not in SPEAKERS:
+                    continue  # Skip invalid speaker roles
                 text = parts[1].strip()
                 action = parts[2].strip() if len(parts) > 2 and parts[2].strip() else None
                 
@@ -172,26 +353,23 @@ class DatasetParser:
                 if len(parts) > 3 and parts[3].strip():
                     satisfaction_scores = self._parse_scores(parts[3].strip())
                 
-                try:
-                    speaker = Speaker(speaker_str)
-                    utterances.append(Utterance(
-                        speaker=speaker,
-                        text=text,
-                        action=action,
-                        satisfaction_scores=satisfaction_scores
-                    ))
-                except ValueError:
-                    continue  # Skip invalid speaker roles
+                utterances.append((speaker_str, text, action, satisfaction_scores))
         
         if utterances:
-            return Dialogue(
-                utterances=utterances,
-                overall_satisfaction=overall_satisfaction,
-                explanations=explanations,
-                language=language
-            )
+            return utterances, overall_satisfaction, explanations
         return None
     
+    @staticmethod
+    def _build_dialogue(record: SessionRecord, language: Language) -> Dialogue:
+        utterances, overall_satisfaction, explanations = record
+        return Dialogue(
+            utterances=[Utterance(speaker=SPEAKERS[speaker], text=text, action=action, satisfaction_scores=scores)
+                        for speaker, text, action, scores in utterances],
+            overall_satisfaction=overall_satisfaction,
+            explanations=explanations,
+            language=language
+        )
+    
     @staticmethod
     def _parse_scores(scores_str: str) -> List[int]:
         """Parse satisfaction scores from string"""
@@ -204,9 +382,52 @@ class DatasetParser:
         return scores
 
 
-def load_dataset(dataset_name: str) -> List[Dialogue]:
-    """Load dataset by name"""
+# Bump when parsing or the Dialogue layout changes, to invalidate existing cache files
+CACHE_VERSION = 4
+
+# Parsed datasets already loaded in this process, keyed by (path, mtime, size)
+_parsed: Dict[Tuple[str, int, int], List[Dialogue]] = {}
+_parsed_lock = threading.Lock()
+
+
+def _cache_path(dataset_path: Path) -> Path:
+    return dataset_path.parent / '.cache' / f'{dataset_path.name}.pkl'
+
+
+def _read_cache(cache_path: Path, mtime_ns: int, size: int) -> Optional[List[Dialogue]]:
+    """Dialogues from a cache file, or None if it is missing, stale or unreadable"""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if (cached.get('version'), cached.get('mtime_ns'), cached.get('size')) != (CACHE_VERSION, mtime_ns, size):
+        return None
+    return cached['dialogues']
+
+
+def _write_cache(cache_path: Path, mtime_ns: int, size: int, dialogues: List[Dialogue]):
+    """Write atomically, so concurrent loaders never read a partial file"""
+    try:
+        cache_path.parent.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'mtime_ns': mtime_ns, 'size': size, 'dialogues': dialogues},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Read-only checkout; parse again next time
+
+
+def _dataset_source(dataset_name: str) -> Tuple[Path, Language]:
+    """Path and language of a dataset by name; NAME.txt, else NAME.txt.gz/.zst/.xz"""
     dataset_path = Path(__file__).parent / 'dataset' / f'{dataset_name}.txt'
+    if not dataset_path.exists():
+        for suffix in COMPRESSED_SUFFIXES:
+            compressed_path = dataset_path.with_name(dataset_path.name + suffix)
+            if compressed_path.exists():
+                dataset_path = compressed_path
+                break
     
     if not dataset_path.exists():
         raise FileNotFoundError(f"Dataset {dataset_name} not found at {dataset_path}")
@@ -216,6 +437,303 @@ def load_dataset(dataset_name: str) -> List[Dialogue]:
         language = Language.CHINESE
     else:
         language = Language.ENGLISH  # MWOZ, CCPE, etc.
-    
+    return dataset_path, language
+
+
+def iter_dataset(dataset_name: str) -> Iterator[Dialogue]:
+    """Stream a dataset by name with bounded memory (no caching)"""
+    dataset_path, language = _dataset_source(dataset_name)
+    return DatasetParser().iter_file(str(dataset_path), language)
+
+
+@dataclass
+class SessionIndexEntry:
+    """Location and basic stats of one session in a dataset file"""
+    offset: int  # Byte offset of the session's first line
+    length: int  # Bytes up to (not including) the blank line that ends it
+    turns: int
+    chars: int  # Characters of utterance text
+    overall: Optional[float]  # Mean OVERALL score, None when the session has none
+
+
+def _parse_chunk(task: Tuple[str, int, int, Language]) -> List[SessionRecord]:
+    """Parse the sessions in a byte range of a dataset file (process pool worker)"""
+    filepath, start, end, language = task
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8').replace('\r\n', '\n')
     parser = DatasetParser()
-    return parser.parse_file(str(dataset_path), language)
+    records = []
+    for session_lines in parser._group_sessions(text.split('\n')):
+        record = parser._parse_record(session_lines, language)
+        if record:
+            records.append(record)
+    return records
+
+
+class DatasetIndex:
+    """Byte-offset index of a dataset's sessions, for parsing only the sessions asked for.
+
+    Entry i is the i-th dialogue yielded by DatasetParser.iter_file. The index
+    is persisted next to the parsed-dataset cache and rebuilt when the
+    source file's mtime or size changes.
+    """
+    
+    def __init__(self, dataset_path: Path, language: Language):
+        if is_compressed(dataset_path):
+            raise ValueError(f"Random access needs an uncompressed file: {dataset_path}")
+        self.path = Path(dataset_path)
+        self.language = language
+        self.parser = DatasetParser()
+        stat = self.path.stat()
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+        self.entries = self._load() or self._build()
+    
+    @property
+    def index_path(self) -> Path:
+        return self.path.parent / '.cache' / f'{self.path.name}.idx.json'
+    
+    def _load(self) -> Optional[List[SessionIndexEntry]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (saved.get('version'), saved.get('mtime_ns'), saved.get('size')) != (CACHE_VERSION, *self._stamp):
+            return None
+        return [SessionIndexEntry(*entry) for entry in saved['entries']]
+    
+    def _build(self) -> List[SessionIndexEntry]:
+        entries = []
+        with open(self.path, 'rb') as f:
+            start, session_lines, position = None, [], 0
+            for line in f:
+                if line.rstrip(b'\r\n'):
+                    if start is None:
+                        start = position
+                    session_lines.append(line)
+                elif start is not None:
+                    entries.extend(self._entry(start, position - start, session_lines))
+                    start, session_lines = None, []
+                position += len(line)
+            if start is not None:
+                entries.extend(self._entry(start, position - start, session_lines))
+        
+        try:
+            self.index_path.parent.mkdir(exist_ok=True)
+            tmp_path = self.index_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'mtime_ns': self._stamp[0], 'size': self._stamp[1],
+                           'entries': [[e.offset, e.length, e.turns, e.chars, e.overall] for e in entries]}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # Read-only checkout; rebuild next time
+        return entries
+    
+    def _entry(self, offset: int, length: int, lines: List[bytes]) -> List[SessionIndexEntry]:
+        """Index entry for a session, or nothing if it yields no dialogue (as iter_file skips it)"""
+        dialogue = self._parse(b''.join(lines))
+        if dialogue is None:
+            return []
+        overall = float(np.mean(dialogue.overall_satisfaction)) if dialogue.overall_satisfaction else None
+        return [SessionIndexEntry(offset, length, len(dialogue.utterances),
+                                  sum(len(utt.text) for utt in dialogue.utterances), overall)]
+    
+    def _parse(self, data: bytes) -> Optional[Dialogue]:
+        text = data.decode('utf-8').replace('\r\n', '\n')
+        return self.parser._parse_lines([line for line in text.split('\n') if line], self.language)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def get_dialogue(self, i: int) -> Dialogue:
+        return self.get_dialogues([i])[0]
+    
+    def get_dialogues(self, ids: Iterable[int]) -> List[Dialogue]:
+        """Parse only the requested sessions, read through a memory map of the file"""
+        ids = list(ids)
+        for i in ids:
+            if not 0 <= i < len(self.entries):
+                raise IndexError(f"Dialogue {i} out of range for {self.path.name} ({len(self.entries)} dialogues)")
+        if not ids:
+            return []
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            dialogues = []
+            for i in ids:
+                entry = self.entries[i]
+                dialogues.append(self._parse(data[entry.offset:entry.offset + entry.length]))
+            return dialogues
+
+
+# Indexes already loaded in this process, keyed by (dataset name, mtime, size)
+_indexes: Dict[Tuple[str, int, int], DatasetIndex] = {}
+
+
+def get_index(dataset_name: str) -> DatasetIndex:
+    """Session index of a dataset by name, building and persisting it if needed"""
+    dataset_path, language = _dataset_source(dataset_name)
+    stat = dataset_path.stat()
+    key = (dataset_name, stat.st_mtime_ns, stat.st_size)
+    with _parsed_lock:
+        if key not in _indexes:
+            _indexes[key] = DatasetIndex(dataset_path, language)
+        return _indexes[key]
+
+
+def get_dialogue(dataset_name: str, i: int) -> Dialogue:
+    """Dialogue i of a dataset (same numbering as load_dataset), parsing only that session"""
+    return get_index(dataset_name).get_dialogue(i)
+
+
+def get_dialogues(dataset_name: str, ids: Iterable[int]) -> List[Dialogue]:
+    """Dialogues of a dataset by id, in the order given, parsing only those sessions"""
+    return get_index(dataset_name).get_dialogues(ids)
+
+
+COLUMNAR_FORMATS = ('arrow', 'parquet')
+
+
+def _columnar_paths(dataset_path: Path, directory: Optional[str], fmt: str) -> Tuple[Path, Path]:
+    base = Path(directory) if directory else dataset_path.parent / '.cache'
+    return (base / f'{dataset_path.name}.dialogues.{fmt}',
+            base / f'{dataset_path.name}.utterances.{fmt}')
+
+
+def export_columnar(dataset_name: str, directory: Optional[str] = None, fmt: str = 'arrow') -> Tuple[Path, Path]:
+    """Write a dataset as two normalized tables (dialogues, utterances) keyed by dialogue_id.
+
+    `fmt` is 'arrow' (IPC file, zero-copy when memory mapped) or 'parquet'
+    (smaller on disk). Files go to dataset/.cache unless `directory` is set.
+    Requires pyarrow.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow library not found. Install with: pip install pyarrow")
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {fmt} (choose from {', '.join(COLUMNAR_FORMATS)})")
+    
+    dataset_path, _ = _dataset_source(dataset_name)
+    stat = dataset_path.stat()
+    dialogues = load_dataset(dataset_name)
+    
+    dialogue_table = pa.table({
+        'dialogue_id': pa.array(range(len(dialogues)), pa.int32()),
+        'language': pa.array([d.language.value for d in dialogues]).dictionary_encode(),
+        'turns': pa.array([len(d.utterances) for d in dialogues], pa.int16()),
+        'chars': pa.array([sum(len(utt.text) for utt in d.utterances) for d in dialogues], pa.int32()),
+        'overall_scores': pa.array([d.overall_satisfaction for d in dialogues], pa.list_(pa.int8())),
+        'average_satisfaction': pa.array([d.average_satisfaction for d in dialogues], pa.float32()),
+        'explanations': pa.array([d.explanations for d in dialogues], pa.list_(pa.string())),
+    })
+    utterance_table = pa.table({
+        'dialogue_id': pa.array([i for i, d in enumerate(dialogues) for _ in d.utterances], pa.int32()),
+        'turn': pa.array([turn for d in dialogues for turn in range(len(d.utterances))], pa.int16()),
+        'speaker': pa.array([utt.speaker.value for d in dialogues for utt in d.utterances]).dictionary_encode(),
+        'text': pa.array([utt.text for d in dialogues for utt in d.utterances], pa.string()),
+        'action': pa.array([utt.action for d in dialogues for utt in d.utterances], pa.string()).dictionary_encode(),
+        'scores': pa.array([utt.satisfaction_scores for d in dialogues for utt in d.utterances],
+                           pa.list_(pa.int8())),
+    })
+    
+    # Source stamp, so loaders can tell a stale export
+    metadata = {'source_mtime_ns': str(stat.st_mtime_ns), 'source_size': str(stat.st_size),
+                'cache_version': str(CACHE_VERSION)}
+    paths = _columnar_paths(dataset_path, directory, fmt)
+    paths[0].parent.mkdir(parents=True, exist_ok=True)
+    for table, path in zip((dialogue_table, utterance_table), paths):
+        _write_table(table.replace_schema_metadata(metadata), path, fmt)
+    return paths
+
+
+def _write_table(table, path: Path, fmt: str):
+    import pyarrow as pa
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(str(tmp_path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_table(path: Path, fmt: str):
+    import pyarrow as pa
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def load_columnar(dataset_name: str, directory: Optional[str] = None, fmt: str = 'arrow',
+                  as_arrow: bool = False):
+    """Dialogues and utterances tables of a dataset, read through a memory map.
+
+    The export is (re)written first when missing or older than the source
+    file. Returns pandas DataFrames, or pyarrow Tables (zero-copy for
+    'arrow') with as_arrow=True. Join them on dialogue_id.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("pyarrow library not found. Install with: pip install pyarrow")
+    
+    dataset_path, _ = _dataset_source(dataset_name)
+    stat = dataset_path.stat()
+    paths = _columnar_paths(dataset_path, directory, fmt)
+    tables = None
+    if all(path.exists() for path in paths):
+        tables = [_read_table(path, fmt) for path in paths]
+        metadata = tables[0].schema.metadata or {}
+        stamp = (metadata.get(b'source_mtime_ns'), metadata.get(b'source_size'), metadata.get(b'cache_version'))
+        if stamp != (str(stat.st_mtime_ns).encode(), str(stat.st_size).encode(), str(CACHE_VERSION).encode()):
+            tables = None
+    if tables is None:
+        tables = [_read_table(path, fmt) for path in export_columnar(dataset_name, directory, fmt)]
+    
+    if as_arrow:
+        return tables[0], tables[1]
+    return tables[0].to_pandas(), tables[1].to_pandas()
+
+
+def cached_dataset(dataset_name: str, read_disk: bool = True) -> Optional[List[Dialogue]]:
+    """Parsed dialogues if already memoized (or, with `read_disk`, in a fresh cache file),
+    else None; never parses the dataset"""
+    dataset_path, _ = _dataset_source(dataset_name)
+    stat = dataset_path.stat()
+    key = (str(dataset_path), stat.st_mtime_ns, stat.st_size)
+    with _parsed_lock:
+        if key not in _parsed:
+            dialogues = _read_cache(_cache_path(dataset_path), stat.st_mtime_ns, stat.st_size) if read_disk else None
+            if dialogues is None:
+                return None
+            _parsed[key] = dialogues
+        return list(_parsed[key])
+
+
+def load_dataset(dataset_name: str, use_cache: bool = True) -> List[Dialogue]:
+    """Load dataset by name.
+
+    Parsed dialogues are memoized in-process and cached as a pickle in
+    dataset/.cache, both invalidated by the source file's mtime and size.
+    Cache misses are parsed serially; see bench_parse.py for the process pool.
+    """
+    dataset_path, language = _dataset_source(dataset_name)
+    
+    if not use_cache:
+        return DatasetParser().parse_file(str(dataset_path), language)
+    
+    stat = dataset_path.stat()
+    key = (str(dataset_path), stat.st_mtime_ns, stat.st_size)
+    with _parsed_lock:
+        if key not in _parsed:
+            cache_path = _cache_path(dataset_path)
+            dialogues = _read_cache(cache_path, stat.st_mtime_ns, stat.st_size)
+            if dialogues is None:
+                dialogues = DatasetParser().parse_file(str(dataset_path), language)
+                _write_cache(cache_path, stat.st_mtime_ns, stat.st_size, dialogues)
+            _parsed[key] = dialogues
+        # Callers may reorder or trim the list; the dialogues themselves are shared
+        return list(_parsed[key])
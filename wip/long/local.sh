@@ -37,3 +37,6 @@ python3 run.py --models chatgpt gemini --datasets MWOZ --sample-size 30 --iterat
 
 # Large scale evaluation
 python3 run.py --models all --datasets JDDC MWOZ --sample-size 200 --iterations 10 --plot --verbose
+
+# Large scale evaluation with parallel dialogues (max 16 requests in flight)
+python3 run.py --models all --datasets JDDC MWOZ --sample-size 200 --iterations 10 --concurrency 16 --plot
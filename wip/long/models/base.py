@@ -6,8 +6,15 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 import json
-import re
+import threading
+import time
+import warnings
 from dataloader import Language
+from models.ratelimit import get_rate_limiter, estimate_tokens
+from models.retry import RetryPolicy, call_with_retry, is_rate_limited, is_unsupported_response_format
+from models.cache import ResponseCache
+from models.schema import criteria_schema
+from models.streaming import read_stream
 
 
 @dataclass
@@ -35,36 +42,345 @@ class CSATOutput:
     fluency_coherence: CriteriaScore
     overall_experience: CriteriaScore
     confidence: Optional[float] = None
+    parse_error: Optional[str] = None  # Set when the response was not a complete answer
+
+
+# Output JSON key -> CSATOutput field
+CRITERIA = {
+    'TaskSuccess': 'task_success',
+    'HelpfulnessRelevance': 'helpfulness_relevance',
+    'FaithfulnessAccuracy': 'faithfulness_accuracy',
+    'EmpathyPoliteness': 'empathy_politeness',
+    'ComplianceSafety': 'compliance_safety',
+    'EfficiencyEffort': 'efficiency_effort',
+    'FluencyCoherence': 'fluency_coherence',
+    'OverallExperience': 'overall_experience'
+}
+
+# Criteria the model scores in scores-only mode; OverallExperience is computed locally
+SCORED_CRITERIA = [key for key in CRITERIA if key != 'OverallExperience']
+
+# OverallExperience weights for scores-only mode: the standalone rubric's weights (standalone/prompts.py)
+# on the matching criteria. Its Understanding criterion has no counterpart here, nor ComplianceSafety and
+# EfficiencyEffort there, so those carry no weight; the average is taken over the weights' sum.
+# Models take others from config 'overall_weights'.
+OVERALL_WEIGHTS = {
+    'TaskSuccess': 0.40,
+    'HelpfulnessRelevance': 0.15,
+    'FaithfulnessAccuracy': 0.15,
+    'EmpathyPoliteness': 0.10,
+    'FluencyCoherence': 0.10,
+}
+
+
+def describe_weights(weights: Dict[str, float]) -> str:
+    """One-line description of OverallExperience weights, for run output and reports"""
+    total = sum(weights.values())
+    return "weighted " + ", ".join(f"{key} {weight / total:.0%}" for key, weight in weights.items())
+
+# Output tokens per dialogue in scores-only mode: one JSON object of seven integers, with headroom
+SCORES_MAX_TOKENS = 128
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """Prompt split into a static prefix shared by every dialogue and the per-dialogue suffix.
+
+    The prefix goes first, as a system message or system instruction, so
+    providers can serve it from their prompt cache; only the suffix is new input.
+    """
+    system: str
+    user: str
+    dialogues: int = 1  # Dialogues scored per response; scales the output token budget
+    compact: bool = False  # Scores-only output, which gets the small scores_max_tokens budget
+
+    @property
+    def text(self) -> str:
+        return f"{self.system}\n\n{self.user}"
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user}]
+
+
+@dataclass
+class ModelResponse:
+    """Raw model response plus call statistics"""
+    text: str
+    retries: int = 0
+    throttled: int = 0  # Retries caused by provider rate limiting (429)
+    latency: float = 0.0  # Seconds spent in the successful provider call
+    cached: bool = False  # Served from the response cache, no provider call
+    prompt_tokens: int = 0  # Input tokens billed for the request (on its first sample)
+    cached_tokens: int = 0  # Of which served from the provider's prompt cache
+    usage_missing: bool = False  # The provider reported no usage (e.g. stream closed before its usage chunk)
+    ttft: Optional[float] = None  # Streaming only: seconds to the first token
+    time_to_score: Optional[float] = None  # Streaming only: seconds until every required score arrived
 
 
 class BaseCSATModel(ABC):
+    # Samples one request can return (n / candidate_count); 1 means no multi-sample support
+    MAX_SAMPLES_PER_REQUEST = 1
+    # Whether the backend passes _response_schema() to the provider's structured-output mode
+    SUPPORTS_STRUCTURED_OUTPUT = False
+    
     def __init__(self, model_name: str, config: Dict[str, Any] = None):
         self.model_name = model_name
         self.config = config or {}
+        # Shared per provider and API key; None when no rpm/tpm budget is configured
+        self.rate_limiter = get_rate_limiter(
+            model_name, self.config.get('api_key'), self.config.get('rpm'), self.config.get('tpm')
+        )
+        self.retry_policy = RetryPolicy.from_config(self.config)
+        # Optional persistent response cache, attached by the runner
+        self.cache: Optional[ResponseCache] = None
+        # Usage of the provider call in flight on each thread, set by the backends
+        self._usage = threading.local()
+        # Cleared when the provider rejects the structured-output parameters
+        self._structured_output_supported = self.SUPPORTS_STRUCTURED_OUTPUT
+        self._structured_output_lock = threading.Lock()
         self._initialize_model()
     
     @abstractmethod
     def _initialize_model(self): pass
     
     @abstractmethod
-    def _generate_response(self, prompt: str) -> str: pass
+    def _generate_response(self, prompt: Prompt) -> str: pass
+    
+    def _generate_responses(self, prompt: Prompt, n: int) -> List[str]:
+        """Generate up to n samples in one request; without provider support, as separate calls"""
+        return [self._generate_response(prompt) for _ in range(n)]
+    
+    @property
+    def max_samples_per_request(self) -> int:
+        """Configured samples per request, capped at what the provider supports"""
+        return max(1, min(self.config.get('max_samples_per_request', self.MAX_SAMPLES_PER_REQUEST),
+                          self.MAX_SAMPLES_PER_REQUEST))
+    
+    @property
+    def scores_only(self) -> bool:
+        """Integer scores without justifications; OverallExperience is computed from the rubric weights"""
+        return self.config.get('output_mode', 'full') == 'scores'
+    
+    @property
+    def overall_weights(self) -> Dict[str, float]:
+        """Criteria weights of the locally computed OverallExperience (scores-only mode)"""
+        return self.config.get('overall_weights', OVERALL_WEIGHTS)
+    
+    @property
+    def streaming(self) -> bool:
+        """Stream completions and stop reading once the JSON answer is complete"""
+        return self.config.get('stream', False)
+    
+    @property
+    def structured_output(self) -> bool:
+        """Constrain answers with the provider's JSON mode; otherwise the prompt alone asks for JSON"""
+        return self._structured_output_supported and self.config.get('structured_output', True)
+    
+    @property
+    def justified_iterations(self) -> int:
+        """Leading iterations per dialogue that still ask for justifications in scores-only mode"""
+        return self.config.get('justified_iterations', 1)
+    
+    def generate(self, prompt: Prompt, iteration: int = 0) -> ModelResponse:
+        """Generate a response, retrying transient errors with backoff"""
+        return self.generate_many(prompt, 1, iteration)[0]
+    
+    def generate_many(self, prompt: Prompt, k: int, start_iteration: int = 0) -> List[ModelResponse]:
+        """Generate k samples, packing them into as few requests as the provider allows.
+        
+        Samples are numbered from `start_iteration`; cached iterations are not requested again.
+        """
+        iterations = list(range(start_iteration, start_iteration + k))
+        responses = {}
+        for iteration in iterations:
+            cached = self._cache_get(prompt, iteration)
+            if cached is not None:
+                responses[iteration] = cached
+        
+        missing = [iteration for iteration in iterations if iteration not in responses]
+        while missing:
+            # Providers may return fewer samples than asked for; request the rest next round
+            n = min(max(1, self.max_samples_per_request), len(missing))
+            if n == 1:
+                batch = self._request(prompt, 1, lambda: [self._generate_response(prompt)])
+            else:
+                batch = self._request(prompt, n, lambda: self._generate_responses(prompt, n))
+            for iteration, response in zip(missing, batch):
+                responses[iteration] = response
+                self._cache_put(prompt, iteration, response)
+            missing = missing[len(batch):]
+        
+        return [responses[iteration] for iteration in iterations]
+    
+    def _cache_key(self, prompt: Prompt, iteration: int) -> str:
+        # Settings at their old defaults stay out of the key, so existing cache entries still match
+        extra = {}
+        schema = self._response_schema(prompt)
+        if schema is not None:
+            extra['response_schema'] = schema
+        if self.streaming:
+            extra['stream'] = True
+        return ResponseCache.make_key(
+            self.model_name, self.config.get('model_version'), self.config.get('temperature', 0.3),
+            self._max_tokens(prompt), [prompt.system, prompt.user], iteration, **extra
+        )
+    
+    def _cache_get(self, prompt: Prompt, iteration: int) -> Optional[ModelResponse]:
+        if self.cache is None:
+            return None
+        text = self.cache.get(self._cache_key(prompt, iteration))
+        return ModelResponse(text=text, cached=True) if text is not None else None
+    
+    def _cache_put(self, prompt: Prompt, iteration: int, response: ModelResponse):
+        if self.cache is not None:
+            self.cache.put(self._cache_key(prompt, iteration), response.text)
+    
+    def _request(self, prompt: Prompt, n: int, send) -> List[ModelResponse]:
+        """Run one provider request for n samples with rate limiting and retries"""
+        stats = {'latency': 0.0, 'throttled': 0}
+        
+        def attempt() -> List[str]:
+            self._wait_for_rate_limit(prompt, n)
+            self._usage.tokens = None
+            self._usage.timing = (None, None)
+            start = time.monotonic()
+            try:
+                structured = self._response_schema(prompt) is not None
+                try:
+                    return send()
+                except Exception as e:
+                    if not (structured and is_unsupported_response_format(e)):
+                        raise
+                    self._disable_structured_output(e)
+                    # The re-send is a new request against the rate limit
+                    self._wait_for_rate_limit(prompt, n)
+                    return send()
+            finally:
+                stats['latency'] = time.monotonic() - start
+        
+        def on_retry(error: BaseException):
+            if is_rate_limited(error):
+                stats['throttled'] += 1
+        
+        texts, retries = call_with_retry(attempt, self.retry_policy, on_retry=on_retry)
+        usage = self._usage.tokens
+        prompt_tokens, cached_tokens = usage or (0, 0)
+        ttft, time_to_score = self._usage.timing
+        # Retries and prompt tokens belong to the request, so they are counted once, on its first sample
+        return [
+            ModelResponse(text=text, retries=retries if i == 0 else 0,
+                          throttled=stats['throttled'] if i == 0 else 0, latency=stats['latency'],
+                          prompt_tokens=prompt_tokens if i == 0 else 0,
+                          cached_tokens=cached_tokens if i == 0 else 0,
+                          usage_missing=usage is None and i == 0,
+                          ttft=ttft, time_to_score=time_to_score)
+            for i, text in enumerate(texts)
+        ]
+    
+    def _disable_structured_output(self, error: BaseException):
+        """Fall back to prompt-only JSON for the rest of the run, warning once across threads"""
+        with self._structured_output_lock:
+            if not self._structured_output_supported:
+                return
+            self._structured_output_supported = False
+        warnings.warn(f"{self.model_name} rejected structured output, using prompt-only JSON: {error}")
+    
+    def _response_schema(self, prompt: Prompt) -> Optional[Dict[str, Any]]:
+        """JSON schema the answer to `prompt` must follow, or None to rely on the prompt alone.
+        
+        Batch prompts answer with a JSON array, which the providers' JSON modes do not
+        take as the top-level value, so they stay prompt-only.
+        """
+        if not self.structured_output or prompt.dialogues > 1:
+            return None
+        if prompt.compact:
+            return criteria_schema(SCORED_CRITERIA, justify=False)
+        return criteria_schema(CRITERIA)
+    
+    def output_budget(self, dialogues: int = 1, compact: bool = False) -> int:
+        """Output tokens one sample over `dialogues` dialogues asks for, before the model's cap"""
+        if compact:
+            return self.config.get('scores_max_tokens', SCORES_MAX_TOKENS) * dialogues
+        return self.config.get('max_tokens', 2000) * dialogues
+    
+    def _max_tokens(self, prompt: Prompt) -> int:
+        """Output token budget for one sample of `prompt` (the configured budgets are per dialogue),
+        capped at the model's output limit (config 'max_output_tokens')"""
+        budget = self.output_budget(prompt.dialogues, prompt.compact)
+        cap = self.config.get('max_output_tokens')
+        return min(budget, cap) if cap else budget
+    
+    def _record_usage(self, prompt_tokens: int, cached_tokens: int):
+        """Report the prompt and provider-cached prompt tokens of the call in flight on this thread"""
+        self._usage.tokens = (prompt_tokens or 0, cached_tokens or 0)
+    
+    def _read_stream(self, prompt: Prompt, n: int, events, start: float) -> List[str]:
+        """Texts of a streamed request, read only until each sample's JSON answer is complete.
+        
+        `events` yields (sample index, text delta); `start` is when the request was sent.
+        Records time to first token and time until every required score arrived.
+        """
+        required = SCORED_CRITERIA if self.scores_only else CRITERIA
+        result = read_stream(events, n, required, prompt.dialogues, start)
+        self._usage.timing = (result.ttft, result.time_to_score)
+        return [text for text in result.texts if text]
+    
+    def _wait_for_rate_limit(self, prompt: Prompt, n: int = 1):
+        """Block until the rate-limit budget admits one request for n samples of `prompt`"""
+        if self.rate_limiter is not None:
+            # Providers count max_tokens (per sample) against the TPM budget up front
+            self.rate_limiter.acquire(estimate_tokens(prompt.text) + n * self._max_tokens(prompt))
     
     def predict(self, input_data: CSATInput) -> CSATOutput:
         prompt = self._construct_prompt(input_data)
-        response = self._generate_response(prompt)
-        return self._parse_output(response)
+        response = self.generate(prompt)
+        return self._parse_output(response.text)
     
-    def _construct_prompt(self, input_data: CSATInput) -> str:
+    def _construct_prompt(self, input_data: CSATInput, justify: bool = True) -> Prompt:
+        """Prompt for one dialogue; `justify=False` asks for scores only when in scores-only mode"""
         template = self._get_template(input_data.language)
-        return template.format(
-            dialogue_transcript=input_data.dialogue
+        compact = self.scores_only and not justify
+        return Prompt(
+            system=self._get_system_prompt(input_data.language, compact),
+            user=template.format(dialogue_transcript=input_data.dialogue),
+            compact=compact
         )
     
     def _get_template(self, language: Language) -> str:
+        """Per-dialogue suffix; everything invariant belongs in the system prompt"""
+        return """=== Now evaluate the following dialogue ===
+
+{dialogue_transcript}
+"""
+    
+    def _construct_batch_prompt(self, inputs: List[CSATInput], justify: bool = True) -> Prompt:
+        """One prompt scoring several dialogues, numbered from 1 in the order given"""
+        blocks = [
+            f"=== Dialogue {dialogue_id} ===\n\n{input_data.dialogue}\n"
+            for dialogue_id, input_data in enumerate(inputs, 1)
+        ]
+        compact = self.scores_only and not justify
+        return Prompt(
+            system=self._get_batch_system_prompt(inputs[0].language, compact),
+            user="\n".join(blocks),
+            dialogues=len(inputs),
+            compact=compact
+        )
+    
+    def _get_system_prompt(self, language: Language, compact: bool = False) -> str:
+        if compact:
+            return self._get_rubric(language) + self._get_scores_output_format(language)
+        return self._get_rubric(language) + self._get_output_format(language)
+    
+    def _get_batch_system_prompt(self, language: Language, compact: bool = False) -> str:
+        if compact:
+            return self._get_rubric(language) + self._get_batch_scores_output_format(language)
+        return self._get_rubric(language) + self._get_batch_output_format(language)
+    
+    def _get_rubric(self, language: Language) -> str:
         # For now, using English template - can be extended for other languages
-        return """
-You are an evaluator for customer service dialogues. 
-Your task is to score the following transcript according to 7 criteria, each from 0 (worst) to 100 (best).
+        return """You are an evaluator for customer service dialogues. 
+Your task is to score each transcript you are given according to 7 criteria, each from 0 (worst) to 100 (best).
 
 1. **TaskSuccess**  
    - Was the customer's issue resolved correctly and completely?  
@@ -96,67 +412,163 @@ Your task is to score the following transcript according to 7 criteria, each fro
 
 ---
 
-=== Final Output: ===
+"""
+    
+    def _get_output_format(self, language: Language) -> str:
+        return """=== Final Output: ===
 - Assign individual scores for each criterion (0–100).
 - Provide a **brief justification** for each score.
 - Based on the criteria, justify **OverallExperience**, how satisfied would the customer likely be?
 
 Expected Output strictly in JSON format:
-{{
-  "TaskSuccess": {{"score": <int>, "justification": "<short explanation>"}},
-  "HelpfulnessRelevance": {{"score": <int>, "justification": "<short explanation>"}},
-  "FaithfulnessAccuracy": {{"score": <int>, "justification": "<short explanation>"}},
-  "EmpathyPoliteness": {{"score": <int>, "justification": "<short explanation>"}},
-  "ComplianceSafety": {{"score": <int>, "justification": "<short explanation>"}},
-  "EfficiencyEffort": {{"score": <int>, "justification": "<short explanation>"}},
-  "FluencyCoherence": {{"score": <int>, "justification": "<short explanation>"}},
-  "OverallExperience": {{"score": <int>, "justification": "<explain how it was calculated>"}}
-}}
-
-=== Customer Service Dialogue ===
+{
+  "TaskSuccess": {"score": <int>, "justification": "<short explanation>"},
+  "HelpfulnessRelevance": {"score": <int>, "justification": "<short explanation>"},
+  "FaithfulnessAccuracy": {"score": <int>, "justification": "<short explanation>"},
+  "EmpathyPoliteness": {"score": <int>, "justification": "<short explanation>"},
+  "ComplianceSafety": {"score": <int>, "justification": "<short explanation>"},
+  "EfficiencyEffort": {"score": <int>, "justification": "<short explanation>"},
+  "FluencyCoherence": {"score": <int>, "justification": "<short explanation>"},
+  "OverallExperience": {"score": <int>, "justification": "<explain how it was calculated>"}
+}
+"""
+    
+    def _get_scores_output_format(self, language: Language) -> str:
+        return """=== Final Output: ===
+- Assign an integer score for each criterion (0–100).
+- Do not add justifications or an OverallExperience score.
 
-{dialogue_transcript}
----
+Expected Output strictly in JSON format, on one line:
+{"TaskSuccess": <int>, "HelpfulnessRelevance": <int>, "FaithfulnessAccuracy": <int>, "EmpathyPoliteness": <int>, \
+"ComplianceSafety": <int>, "EfficiencyEffort": <int>, "FluencyCoherence": <int>}
+"""
+    
+    def _get_batch_scores_output_format(self, language: Language) -> str:
+        return """=== Final Output: ===
+You are given several dialogues, each under a "=== Dialogue <id> ===" heading. Score every dialogue on its own.
+- Assign an integer score for each criterion (0–100).
+- Do not add justifications or an OverallExperience score.
 
-=== Now evaluate the following dialogue ===
+Expected Output strictly as a JSON array with one object per dialogue, in the order given, one object per line:
+[
+  {"dialogue_id": <int>, "TaskSuccess": <int>, "HelpfulnessRelevance": <int>, "FaithfulnessAccuracy": <int>, \
+"EmpathyPoliteness": <int>, "ComplianceSafety": <int>, "EfficiencyEffort": <int>, "FluencyCoherence": <int>}
+]
+"""
+    
+    def _get_batch_output_format(self, language: Language) -> str:
+        return """=== Final Output: ===
+You are given several dialogues, each under a "=== Dialogue <id> ===" heading. Score every dialogue on its own.
+- Assign individual scores for each criterion (0–100).
+- Provide a **brief justification** for each score.
+- Based on the criteria, justify **OverallExperience**, how satisfied would the customer likely be?
+
+Expected Output strictly as a JSON array with one object per dialogue, in the order given:
+[
+  {
+    "dialogue_id": <int>,
+    "TaskSuccess": {"score": <int>, "justification": "<short explanation>"},
+    "HelpfulnessRelevance": {"score": <int>, "justification": "<short explanation>"},
+    "FaithfulnessAccuracy": {"score": <int>, "justification": "<short explanation>"},
+    "EmpathyPoliteness": {"score": <int>, "justification": "<short explanation>"},
+    "ComplianceSafety": {"score": <int>, "justification": "<short explanation>"},
+    "EfficiencyEffort": {"score": <int>, "justification": "<short explanation>"},
+    "FluencyCoherence": {"score": <int>, "justification": "<short explanation>"},
+    "OverallExperience": {"score": <int>, "justification": "<explain how it was calculated>"}
+  }
+]
 """
     
     def _parse_output(self, response: str) -> CSATOutput:
         try:
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if not json_match:
+            # Decode the first JSON object, ignoring any text before or after it
+            start = response.find('{')
+            if start < 0:
                 return self._create_fallback_output("No JSON found in response")
             
-            json_str = json_match.group(0)
-            data = json.loads(json_str)
+            data, _ = json.JSONDecoder().raw_decode(response, start)
             
             # Parse each criteria
-            criteria_mapping = {
-                'TaskSuccess': 'task_success',
-                'HelpfulnessRelevance': 'helpfulness_relevance',
-                'FaithfulnessAccuracy': 'faithfulness_accuracy',
-                'EmpathyPoliteness': 'empathy_politeness',
-                'ComplianceSafety': 'compliance_safety',
-                'EfficiencyEffort': 'efficiency_effort',
-                'FluencyCoherence': 'fluency_coherence',
-                'OverallExperience': 'overall_experience'
-            }
-            
             parsed_criteria = {}
-            for json_key, attr_name in criteria_mapping.items():
-                if json_key in data:
-                    score = self._validate_score(data[json_key].get('score', 50))
-                    justification = data[json_key].get('justification', 'No justification provided')
+            missing = []
+            for json_key, attr_name in CRITERIA.items():
+                value = data.get(json_key)
+                if isinstance(value, dict):
+                    score = self._validate_score(value.get('score', 50))
+                    justification = value.get('justification', 'No justification provided')
                     parsed_criteria[attr_name] = CriteriaScore(score=score, justification=justification)
+                elif value is not None:
+                    # Scores-only output: a bare score, no justification
+                    parsed_criteria[attr_name] = CriteriaScore(score=self._validate_score(value), justification='')
                 else:
                     parsed_criteria[attr_name] = CriteriaScore(score=50, justification='Criteria not found in response')
+                    missing.append(json_key)
+            
+            if self.scores_only:
+                parsed_criteria['overall_experience'] = self._overall_experience(parsed_criteria)
+                missing = [key for key in missing if key in SCORED_CRITERIA]
             
-            return CSATOutput(**parsed_criteria)
+            parse_error = f"Criteria not found in response: {', '.join(missing)}" if missing else None
+            return CSATOutput(**parsed_criteria, parse_error=parse_error)
             
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
             return self._create_fallback_output(f"Error parsing JSON: {str(e)}")
     
+    def _overall_experience(self, parsed_criteria: Dict[str, CriteriaScore]) -> CriteriaScore:
+        """OverallExperience as the weighted average of the criteria scores"""
+        weights = self.overall_weights
+        total = sum(weights[key] * parsed_criteria[CRITERIA[key]].score for key in weights)
+        return CriteriaScore(score=int(round(total / sum(weights.values()))),
+                             justification='Weighted average of the criteria scores, computed locally')
+    
+    def _split_batch_output(self, response: str, count: int) -> Dict[int, str]:
+        """Split a batch response into single-dialogue JSON outputs, keyed by dialogue id (1..count).
+        
+        Ids that are missing, duplicated or lack a scored criterion are left out, for
+        the caller to score with single-dialogue requests.
+        """
+        # Decode entry by entry, so a response cut off by max_tokens keeps its complete entries
+        entries = []
+        decoder = json.JSONDecoder()
+        pos = response.find('[') + 1
+        while pos:
+            while pos < len(response) and (response[pos].isspace() or response[pos] == ','):
+                pos += 1
+            if pos >= len(response) or response[pos] == ']':
+                break
+            try:
+                entry, pos = decoder.raw_decode(response, pos)
+            except json.JSONDecodeError:
+                break
+            entries.append(entry)
+        
+        def well_formed(criterion) -> bool:
+            try:
+                int(criterion['score'] if isinstance(criterion, dict) else criterion)
+                return True
+            except (TypeError, KeyError, ValueError):
+                return False
+        
+        required = SCORED_CRITERIA if self.scores_only else CRITERIA
+        
+        outputs, seen = {}, set()
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                dialogue_id = int(entry.get('dialogue_id'))
+            except (TypeError, ValueError):
+                continue
+            if dialogue_id in seen:
+                outputs.pop(dialogue_id, None)
+                continue
+            seen.add(dialogue_id)
+            if not 1 <= dialogue_id <= count or not all(well_formed(entry.get(key)) for key in required):
+                continue
+            outputs[dialogue_id] = json.dumps({key: entry[key] for key in CRITERIA if key in entry},
+                                              ensure_ascii=False)
+        return outputs
+    
     def _validate_score(self, score: Any) -> int:
         """Validate and clamp score to 0-100 range"""
         try:
@@ -177,5 +589,6 @@ Expected Output strictly in JSON format:
             compliance_safety=fallback_criteria,
             efficiency_effort=fallback_criteria,
             fluency_coherence=fallback_criteria,
-            overall_experience=fallback_criteria
+            overall_experience=fallback_criteria,
+            parse_error=error_msg
         )
@@ -0,0 +1,157 @@
+"""
+Persistent content-addressed cache of LLM responses (SQLite)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """Disk-backed response cache with size- and age-based eviction.
+
+    Entries are keyed by a hash of everything that determines a response:
+    provider, model version, sampling parameters, prompt and iteration index.
+    The iteration index keeps repeated samples of one prompt distinct, so a
+    re-run replays the same per-iteration responses instead of re-billing.
+    """
+
+    # Evict every this many writes, besides once on open
+    EVICT_EVERY = 100
+
+    def __init__(self, path: str, max_size_mb: Optional[float] = None, max_age_days: Optional[float] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(provider: str, model_version: str, temperature: Any, max_tokens: Any,
+                 prompt: Any, iteration: int = 0, **extra) -> str:
+        """Hash of the request content; `extra` covers any other parameter that changes the output"""
+        payload = {
+            'provider': provider,
+            'model_version': model_version,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'prompt': prompt,
+            'iteration': iteration,
+            **extra
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode('utf-8')), now, now)
+            )
+            self._conn.commit()
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size cap"""
+        with self._lock:
+            if self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+                    stale = []
+                    for key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((key,))
+                        total -= size
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._conn.commit()
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def prompt_cache_usage(usage) -> Tuple[int, int]:
+    """(prompt tokens, prompt tokens served from the provider's prompt cache) of an OpenAI-compatible usage"""
+    if usage is None:
+        return 0, 0
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return getattr(usage, 'prompt_tokens', 0) or 0, getattr(details, 'cached_tokens', 0) or 0
+
+
+def cached_chat_completion(cache: Optional[ResponseCache], client, iteration: int = 0,
+                           usage: Optional[Dict[str, int]] = None, **request) -> str:
+    """Content of an OpenAI-compatible chat completion, served from `cache` when possible.
+
+    Fresh calls add their prompt and provider-cached prompt token counts to `usage`.
+    """
+    key = None
+    if cache is not None:
+        key = ResponseCache.make_key(
+            provider=str(client.base_url),
+            model_version=request.get('model'),
+            temperature=request.get('temperature'),
+            max_tokens=request.get('max_tokens'),
+            prompt=request.get('messages'),
+            iteration=iteration,
+            extra_params={k: v for k, v in request.items()
+                          if k not in ('model', 'temperature', 'max_tokens', 'messages')}
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    resp = client.chat.completions.create(**request)
+    if usage is not None:
+        prompt_tokens, cached_tokens = prompt_cache_usage(getattr(resp, 'usage', None))
+        usage['prompt_tokens'] = usage.get('prompt_tokens', 0) + prompt_tokens
+        usage['cached_tokens'] = usage.get('cached_tokens', 0) + cached_tokens
+    content = resp.choices[0].message.content
+    if cache is not None and content:
+        cache.put(key, content)
+    return content
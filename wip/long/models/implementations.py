@@ -3,14 +3,44 @@ Model implementations for ChatGPT, Gemini, Qwen, and Mistral - Updated for 7-cri
 """
 
 import os
+import threading
+import time
 import warnings
-from models.base import BaseCSATModel
+from typing import List
+from models.base import BaseCSATModel, Prompt
+from models.cache import prompt_cache_usage
+from models.retry import EmptyResponseError
+from models.schema import JSON_OBJECT_FORMAT, gemini_response_schema, openai_response_format
 warnings.filterwarnings('ignore')
 
 
+def _stream_chat_completion(model: BaseCSATModel, prompt: Prompt, n: int, **request) -> List[str]:
+    """Stream an OpenAI-compatible chat completion, reading text only until every sample's answer is complete.
+    
+    The stream is closed as soon as the answers are complete, so a request cut off
+    before the usage chunk that ends the stream reports no usage.
+    """
+    start = time.monotonic()
+    with model.client.chat.completions.create(stream=True, stream_options={"include_usage": True},
+                                              **request) as stream:
+        def events():
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    model._record_usage(*prompt_cache_usage(chunk.usage))
+                for choice in chunk.choices or []:
+                    yield choice.index, choice.delta.content
+        
+        texts = model._read_stream(prompt, n, events(), start)
+        stream.close()
+        return texts
+
+
 class ChatGPTModel(BaseCSATModel):
     """OpenAI ChatGPT implementation"""
     
+    MAX_SAMPLES_PER_REQUEST = 8
+    SUPPORTS_STRUCTURED_OUTPUT = True
+    
     def _initialize_model(self):
         try:
             import openai
@@ -18,24 +48,38 @@ class ChatGPTModel(BaseCSATModel):
                 raise ValueError("model_version is required for ChatGPT")
             if not self.config.get('api_key'):
                 raise ValueError("API key is required for ChatGPT")
-            self.client = openai.OpenAI(api_key=self.config['api_key'])
+            # Retries are handled by BaseCSATModel.generate
+            self.client = openai.OpenAI(api_key=self.config['api_key'], max_retries=0)
             self.model_version = self.config['model_version']
         except ImportError:
             raise ImportError("OpenAI library not found. Install with: pip install openai")
     
-    def _generate_response(self, prompt: str) -> str:
+    def _generate_response(self, prompt: Prompt) -> str:
+        return self._generate_responses(prompt, 1)[0]
+    
+    def _generate_responses(self, prompt: Prompt, n: int) -> List[str]:
         try:
-            response = self.client.chat.completions.create(
+            # OpenAI caches prompt prefixes of 1024+ tokens automatically; the static system message comes first
+            request = dict(
                 model=self.model_version,
-                messages=[{"role": "user", "content": prompt}],
+                messages=prompt.messages(),
                 temperature=self.config.get('temperature', 0.3),
-                max_tokens=self.config.get('max_tokens', 2000)
+                max_tokens=self._max_tokens(prompt),
+                n=n
             )
+            schema = self._response_schema(prompt)
+            if schema is not None:
+                request['response_format'] = openai_response_format(schema)
+            if self.streaming:
+                texts = _stream_chat_completion(self, prompt, n, **request)
+            else:
+                response = self.client.chat.completions.create(**request)
+                self._record_usage(*prompt_cache_usage(response.usage))
+                texts = [choice.message.content for choice in response.choices or [] if choice.message.content]
+            if not texts:
+                raise EmptyResponseError("Empty response received from ChatGPT API")
             
-            if not response.choices or not response.choices[0].message.content:
-                raise RuntimeError("Empty response received from ChatGPT API")
-            
-            return response.choices[0].message.content
+            return texts
             
         except Exception as e:
             # Re-raise with more context
@@ -45,6 +89,9 @@ class ChatGPTModel(BaseCSATModel):
 class GeminiModel(BaseCSATModel):
     """Google Gemini implementation"""
     
+    MAX_SAMPLES_PER_REQUEST = 8
+    SUPPORTS_STRUCTURED_OUTPUT = True
+    
     def _initialize_model(self):
         try:
             import google.generativeai as genai
@@ -54,31 +101,116 @@ class GeminiModel(BaseCSATModel):
                 raise ValueError("API key is required for Gemini")
                 
             genai.configure(api_key=self.config['api_key'])
-            self.model = genai.GenerativeModel(self.config['model_version'])
-            self.generation_config = genai.types.GenerationConfig(
-                temperature=self.config.get('temperature', 0.3),
-                max_output_tokens=self.config.get('max_tokens', 16000)
-            )
+            self.genai = genai
+            # One model per system prompt, which Gemini takes at construction
+            self._models = {}
+            self._models_lock = threading.Lock()
         except ImportError:
             raise ImportError("Google Generative AI library not found. Install with: pip install google-generativeai")
     
-    def _generate_response(self, prompt: str) -> str:
+    def _model_for(self, prompt: Prompt):
+        """Model carrying the prompt's static prefix as its system instruction.
+        
+        The ~700-token prefix is below Gemini's minimum for an explicit context
+        cache, so it is left to the implicit prefix caching of newer models.
+        """
+        with self._models_lock:
+            model = self._models.get(prompt.system)
+            if model is None:
+                model = self.genai.GenerativeModel(self.config['model_version'], system_instruction=prompt.system)
+                self._models[prompt.system] = model
+            return model
+    
+    def _record_gemini_usage(self, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self._record_usage(getattr(usage, 'prompt_token_count', 0),
+                               getattr(usage, 'cached_content_token_count', 0))
+    
+    def _generation_config(self, prompt: Prompt, candidate_count: int):
+        structured = {}
+        schema = self._response_schema(prompt)
+        if schema is not None:
+            structured = dict(response_mime_type="application/json", response_schema=gemini_response_schema(schema))
+        return self.genai.types.GenerationConfig(
+            temperature=self.config.get('temperature', 0.3),
+            max_output_tokens=self._max_tokens(prompt),
+            candidate_count=candidate_count,
+            **structured
+        )
+    
+    def _stream_content(self, prompt: Prompt, n: int) -> List[str]:
+        """Stream the candidates, stopping once every candidate's answer is complete"""
+        start = time.monotonic()
+        response = self._model_for(prompt).generate_content(
+            prompt.user, generation_config=self._generation_config(prompt, n), stream=True
+        )
+        
+        def events():
+            for chunk in response:
+                self._record_gemini_usage(chunk)
+                for candidate in chunk.candidates:
+                    yield candidate.index, "".join(part.text for part in candidate.content.parts)
+        
+        return self._read_stream(prompt, n, events(), start)
+    
+    def _generate_response(self, prompt: Prompt) -> str:
+        if self.streaming:
+            return self._generate_responses(prompt, 1)[0]
         try:
-            response = self.model.generate_content(prompt, generation_config=self.generation_config)
+            response = self._model_for(prompt).generate_content(
+                prompt.user, generation_config=self._generation_config(prompt, 1)
+            )
+            self._record_gemini_usage(response)
             
             if not response.text:
-                raise RuntimeError("Empty response received from Gemini API")
+                raise EmptyResponseError("Empty response received from Gemini API")
             
             return response.text
             
         except Exception as e:
             # Re-raise with more context
             raise RuntimeError(f"Gemini API error: {str(e)}") from e
+    
+    def _generate_responses(self, prompt: Prompt, n: int) -> List[str]:
+        if self.streaming:
+            try:
+                texts = self._stream_content(prompt, n)
+            except Exception as e:
+                raise RuntimeError(f"Gemini API error: {str(e)}") from e
+            if not texts:
+                raise EmptyResponseError("Empty response received from Gemini API")
+            return texts
+        if n == 1:
+            return [self._generate_response(prompt)]
+        try:
+            response = self._model_for(prompt).generate_content(
+                prompt.user, generation_config=self._generation_config(prompt, n)
+            )
+            self._record_gemini_usage(response)
+            
+            # response.text only covers single-candidate responses
+            texts = []
+            for candidate in response.candidates:
+                text = "".join(part.text for part in candidate.content.parts)
+                if text:
+                    texts.append(text)
+            if not texts:
+                raise EmptyResponseError("Empty response received from Gemini API")
+            
+            return texts
+            
+        except Exception as e:
+            # Re-raise with more context
+            raise RuntimeError(f"Gemini API error: {str(e)}") from e
 
 
 class QwenModel(BaseCSATModel):
     """Qwen model implementation"""
     
+    MAX_SAMPLES_PER_REQUEST = 4  # DashScope accepts n in [1, 4]
+    SUPPORTS_STRUCTURED_OUTPUT = True
+    
     def _initialize_model(self):
         try:
             import openai
@@ -90,25 +222,39 @@ class QwenModel(BaseCSATModel):
             self.client = openai.OpenAI(
                 api_key=self.config['api_key'],
                 base_url=self.config.get('base_url', 'https://dashscope-intl.aliyuncs.com/compatible-mode/v1'),
+                max_retries=0,  # Retries are handled by BaseCSATModel.generate
             )
             self.model_version = self.config['model_version']
         except ImportError as e:
             raise ImportError(f"OpenAI library required for Qwen. Install with: pip install openai") from e
     
-    def _generate_response(self, prompt: str) -> str:
+    def _generate_response(self, prompt: Prompt) -> str:
+        return self._generate_responses(prompt, 1)[0]
+    
+    def _generate_responses(self, prompt: Prompt, n: int) -> List[str]:
         try:
-            response = self.client.chat.completions.create(
+            # DashScope reuses cached prefixes implicitly and reports them in prompt_tokens_details
+            request = dict(
                 model=self.model_version,
-                messages=[{"role": "user", "content": prompt}],
+                messages=prompt.messages(),
                 temperature=self.config.get('temperature', 0.3),
-                max_tokens=self.config.get('max_tokens', 2000),
+                max_tokens=self._max_tokens(prompt),
+                n=n,
                 extra_body={"enable_thinking": False}
             )
+            # DashScope's JSON mode takes no schema; the prompt's output format defines the keys
+            if self._response_schema(prompt) is not None:
+                request['response_format'] = JSON_OBJECT_FORMAT
+            if self.streaming:
+                texts = _stream_chat_completion(self, prompt, n, **request)
+            else:
+                response = self.client.chat.completions.create(**request)
+                self._record_usage(*prompt_cache_usage(response.usage))
+                texts = [choice.message.content for choice in response.choices or [] if choice.message.content]
+            if not texts:
+                raise EmptyResponseError("Empty response received from Qwen API")
             
-            if not response.choices or not response.choices[0].message.content:
-                raise RuntimeError("Empty response received from Qwen API")
-            
-            return response.choices[0].message.content
+            return texts
             
         except Exception as e:
             # Re-raise with more context
@@ -118,6 +264,8 @@ class QwenModel(BaseCSATModel):
 class MistralModel(BaseCSATModel):
     """Mistral AI implementation - English only"""
     
+    SUPPORTS_STRUCTURED_OUTPUT = True
+    
     def _initialize_model(self):
         try:
             from mistralai import Mistral
@@ -139,24 +287,49 @@ class MistralModel(BaseCSATModel):
                 raise ValueError("Mistral does not support Chinese language. Use ChatGPT, Gemini, or Qwen for Chinese datasets.")
         return super().predict(input_data)
     
-    def _generate_response(self, prompt: str) -> str:
+    def _generate_response(self, prompt: Prompt) -> str:
         # Check for Chinese characters in prompt
-        if any('\u4e00' <= char <= '\u9fff' for char in prompt):
+        if any('\u4e00' <= char <= '\u9fff' for char in prompt.text):
             raise ValueError("Chinese text detected in prompt. Mistral only supports English.")
         
         try:
-            response = self.client.chat.complete(
+            request = dict(
                 model=self.model_version,
-                messages=[{"role": "user", "content": prompt}],
+                messages=prompt.messages(),
                 temperature=self.config.get('temperature', 0.3),
-                max_tokens=self.config.get('max_tokens', 2000)
+                max_tokens=self._max_tokens(prompt)
             )
+            if self._response_schema(prompt) is not None:
+                request['response_format'] = JSON_OBJECT_FORMAT
+            if self.streaming:
+                texts = self._stream_chat(prompt, request)
+                if not texts:
+                    raise EmptyResponseError("Empty response received from Mistral API")
+                return texts[0]
+            
+            response = self.client.chat.complete(**request)
+            self._record_usage(*prompt_cache_usage(response.usage))
             
             if not response.choices or not response.choices[0].message.content:
-                raise RuntimeError("Empty response received from Mistral API")
+                raise EmptyResponseError("Empty response received from Mistral API")
             
             return response.choices[0].message.content
             
         except Exception as e:
             # Re-raise with more context
             raise RuntimeError(f"Mistral API error: {str(e)}") from e
+    
+    def _stream_chat(self, prompt: Prompt, request) -> List[str]:
+        """Stream the completion, closing it once the answer is complete (cut-off streams report no usage)"""
+        start = time.monotonic()
+        with self.client.chat.stream(**request) as stream:
+            def events():
+                for event in stream:
+                    if event.data.usage:
+                        self._record_usage(*prompt_cache_usage(event.data.usage))
+                    for choice in event.data.choices:
+                        if isinstance(choice.delta.content, str):
+                            yield choice.index, choice.delta.content
+            
+            # Leaving the block closes the response without reading the rest of the stream
+            return self._read_stream(prompt, 1, events(), start)
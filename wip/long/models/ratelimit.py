@@ -0,0 +1,90 @@
+"""
+Token-bucket rate limiting for provider APIs (requests and tokens per minute)
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per 4 other characters"""
+    cjk = sum(1 for char in text if '\u4e00' <= char <= '\u9fff')
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TokenBucket:
+    """Bucket holding up to `per_minute` units, refilled continuously"""
+
+    def __init__(self, per_minute: float):
+        if per_minute <= 0:
+            raise ValueError("Rate limit budget must be positive")
+        self.capacity = float(per_minute)
+        self.refill_rate = self.capacity / 60.0  # units per second
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.refill_rate
+
+    def consume(self, amount: float):
+        self.available -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one provider API key"""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.total_wait = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request carrying `tokens` tokens fits both budgets"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                if self.requests:
+                    wait = max(wait, self.requests.wait_time(1, now))
+                if self.tokens:
+                    wait = max(wait, self.tokens.wait_time(tokens, now))
+
+                if wait == 0.0:
+                    if self.requests:
+                        self.requests.consume(1)
+                    if self.tokens:
+                        self.tokens.consume(tokens)
+                    return
+                self.total_wait += wait
+            time.sleep(wait)
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, api_key: Optional[str], rpm: Optional[float] = None,
+                     tpm: Optional[float] = None) -> Optional[RateLimiter]:
+    """Return the limiter shared by every model using this provider and API key"""
+    if not rpm and not tpm:
+        return None
+
+    # Never keep raw keys around; a digest is enough to tell keys apart
+    key_id = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+    with _limiters_lock:
+        if (provider, key_id) not in _limiters:
+            _limiters[(provider, key_id)] = RateLimiter(rpm, tpm)
+        return _limiters[(provider, key_id)]
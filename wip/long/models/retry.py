@@ -0,0 +1,155 @@
+"""
+Retry with jittered exponential backoff and error classification for provider APIs
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+class EmptyResponseError(RuntimeError):
+    """Provider returned no content; worth retrying"""
+
+
+# HTTP statuses that are transient (rate limits, timeouts, server errors)
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Exception class names from openai, httpx, google-api-core and mistralai that are transient.
+# Matched by name so none of those libraries has to be importable here.
+RETRYABLE_ERROR_NAMES = {
+    'APITimeoutError', 'APIConnectionError', 'RateLimitError', 'InternalServerError',
+    'TimeoutException', 'ConnectTimeout', 'ReadTimeout', 'ConnectError', 'RemoteProtocolError',
+    'DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted', 'TooManyRequests',
+}
+
+RATE_LIMIT_ERROR_NAMES = {'RateLimitError', 'ResourceExhausted', 'TooManyRequests'}
+
+
+def _error_chain(exc: BaseException) -> Iterator[BaseException]:
+    """Walk an exception and the errors it was raised from"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ('status_code', 'code', 'http_status'):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for transient failures (timeouts, 429, 5xx, empty responses)"""
+    for err in _error_chain(exc):
+        if isinstance(err, EmptyResponseError):
+            return True
+        if isinstance(err, ValueError):
+            return False  # Configuration or unsupported language
+        status = _status_code(err)
+        if status is not None:
+            return status in RETRYABLE_STATUS or status >= 500
+        if isinstance(err, (TimeoutError, ConnectionError)) or type(err).__name__ in RETRYABLE_ERROR_NAMES:
+            return True
+    return False
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True when the provider rejected the request for exceeding its rate limit"""
+    for err in _error_chain(exc):
+        if _status_code(err) == 429 or type(err).__name__ in RATE_LIMIT_ERROR_NAMES:
+            return True
+    return False
+
+
+# Request parameters named in a provider's rejection of an unsupported structured-output mode
+RESPONSE_FORMAT_PARAMETERS = ('response_format', 'json_schema', 'json_object', 'response_schema', 'response_mime_type')
+
+
+def is_unsupported_response_format(exc: BaseException) -> bool:
+    """True when the provider (400) or an older SDK (TypeError) rejected the structured-output parameters"""
+    for err in _error_chain(exc):
+        rejected = _status_code(err) in (400, 422) or isinstance(err, TypeError)
+        if rejected and any(name in str(err) for name in RESPONSE_FORMAT_PARAMETERS):
+            return True
+    return False
+
+
+def _parse_retry_after(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After headers if present"""
+    for err in _error_chain(exc):
+        delay = _parse_retry_after(getattr(err, 'retry_after', None))
+        if delay is not None:
+            return delay
+
+        response = getattr(err, 'response', None) or getattr(err, 'raw_response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            continue
+        if headers.get('retry-after-ms') is not None:
+            delay = _parse_retry_after(headers.get('retry-after-ms'))
+            if delay is not None:
+                return delay / 1000.0
+        delay = _parse_retry_after(headers.get('retry-after'))
+        if delay is not None:
+            return delay
+    return None
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff settings"""
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RetryPolicy':
+        return cls(
+            max_retries=config.get('max_retries', cls.max_retries),
+            base_delay=config.get('retry_base_delay', cls.base_delay),
+            max_delay=config.get('retry_max_delay', cls.max_delay)
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def call_with_retry(func: Callable[[], Any], policy: RetryPolicy,
+                    sleep: Callable[[float], None] = time.sleep,
+                    on_retry: Optional[Callable[[BaseException], None]] = None) -> Tuple[Any, int]:
+    """Call `func`, retrying transient failures. Returns (result, retries used)."""
+    attempt = 0
+    while True:
+        try:
+            return func(), attempt
+        except Exception as e:
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            # Honor the provider's Retry-After, but never retry sooner than the backoff
+            delay = max(policy.backoff(attempt), retry_after(e) or 0.0)
+            attempt += 1
+            if on_retry is not None:
+                on_retry(e)
+            sleep(delay)
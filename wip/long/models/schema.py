@@ -0,0 +1,55 @@
+"""
+One JSON schema for the evaluation answer, rendered into each provider's structured-output format
+"""
+
+from typing import Any, Dict, Iterable
+
+# Bounds are left to BaseCSATModel._validate_score; not every provider accepts minimum/maximum
+SCORE_SCHEMA = {"type": "integer", "description": "Score from 0 to 100"}
+
+JUSTIFIED_SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": SCORE_SCHEMA,
+        "justification": {"type": "string"},
+    },
+    "required": ["score", "justification"],
+    "additionalProperties": False,
+}
+
+# JSON mode for providers that take no schema; the prompt's output format defines the keys
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Schema keywords Gemini's response_schema understands
+GEMINI_SCHEMA_KEYS = {'type', 'format', 'description', 'nullable', 'enum', 'properties', 'required', 'items'}
+
+
+def criteria_schema(criteria: Iterable[str], justify: bool = True) -> Dict[str, Any]:
+    """Schema of one answer object: every criterion, as {"score", "justification"} or a bare score"""
+    criteria = list(criteria)
+    value = JUSTIFIED_SCORE_SCHEMA if justify else SCORE_SCHEMA
+    return {
+        "type": "object",
+        "properties": {key: value for key in criteria},
+        "required": criteria,
+        "additionalProperties": False,
+    }
+
+
+def openai_response_format(schema: Dict[str, Any], name: str = 'csat_evaluation') -> Dict[str, Any]:
+    """OpenAI response_format enforcing the schema (strict structured outputs)"""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def gemini_response_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """The schema reduced to the subset Gemini accepts (no additionalProperties)"""
+    reduced = {}
+    for key, value in schema.items():
+        if key not in GEMINI_SCHEMA_KEYS:
+            continue
+        if key == 'properties':
+            value = {name: gemini_response_schema(prop) for name, prop in value.items()}
+        elif key == 'items':
+            value = gemini_response_schema(value)
+        reduced[key] = value
+    return reduced
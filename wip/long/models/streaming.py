@@ -0,0 +1,187 @@
+"""
+Incremental scanning of streamed JSON answers, to stop reading once every score has arrived
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class _Frame:
+    """An open JSON object or array"""
+    kind: str  # '{' or '['
+    name: Optional[str]  # Key this container sits under in its parent object
+    entry: Optional[int]  # Index of the answer object it belongs to
+    is_entry: bool  # Is itself an answer object (top-level object, or object in a top-level array)
+    key: Optional[str] = None  # Current key, between ':' and the next ','
+
+
+class StreamingJSONScanner:
+    """Scans a streamed response one chunk at a time, never re-parsing what came before.
+
+    Text before the answer (prose, code fences) is skipped. The answer is the
+    first top-level JSON value that is an object, or an array of objects for
+    batch prompts, and that scores at least one criterion; a bracket that turns
+    out to open something else, such as "[final]" in prose, is skipped too.
+    A criterion counts as scored once a number arrives under it, either as
+    {"Criterion": {"score": 80, ...}} or as {"Criterion": 80}.
+    """
+
+    NUMBER_START = set('-0123456789')
+    NUMBER_CHARS = set('0123456789.eE+-')
+    # Characters that may follow the opening bracket of an answer, besides whitespace
+    FIRST_CHARS = {'{': '"}', '[': '{'}
+
+    def __init__(self, required: Iterable[str], entries: int = 1):
+        self.required = set(required)
+        self.entries = entries  # Answer objects expected (dialogues in a batch)
+        self.scored: Set[Tuple[int, str]] = set()
+        self.complete = False  # The top-level value has closed
+        self.length = 0  # Characters consumed, up to the end of the top-level value once complete
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []
+        self._last_string: Optional[str] = None
+        self._number: List[str] = []
+        self._next_entry = 0
+        self._opened: Optional[str] = None  # Top-level bracket awaiting its first character
+
+    @property
+    def scores_complete(self) -> bool:
+        return len(self.scored) >= len(self.required) * self.entries
+
+    def feed(self, chunk: str) -> bool:
+        """Scan the next chunk; returns `complete`"""
+        for char in chunk:
+            if self.complete:
+                break
+            self.length += 1
+            self._scan(char)
+        return self.complete
+
+    def _scan(self, char: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                self._string.append(char)
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._last_string = ''.join(self._string)
+            else:
+                self._string.append(char)
+            return
+
+        if self._number:
+            if char in self.NUMBER_CHARS:
+                self._number.append(char)
+                return
+            self._on_number()
+
+        if not self._stack:
+            if char in '{[':
+                self._stack.append(_Frame(char, None, 0 if char == '{' else None, char == '{'))
+                self._opened = char
+            return
+
+        if self._opened is not None:
+            if char.isspace():
+                return
+            opened, self._opened = self._opened, None
+            if char not in self.FIRST_CHARS[opened]:
+                # Not an answer after all; look for the next one from this character
+                self._reset()
+                self._scan(char)
+                return
+
+        frame = self._stack[-1]
+        if char == '"':
+            self._in_string = True
+            self._string = []
+        elif char in '{[':
+            is_entry = char == '{' and frame.kind == '[' and len(self._stack) == 1
+            entry = frame.entry
+            if is_entry:
+                entry = self._next_entry
+                self._next_entry += 1
+            self._stack.append(_Frame(char, frame.key if frame.kind == '{' else None, entry, is_entry))
+        elif char in '}]':
+            self._stack.pop()
+            if not self._stack:
+                if self.scored:
+                    self.complete = True
+                else:
+                    self._reset()
+        elif char == ':':
+            frame.key = self._last_string
+        elif char == ',':
+            frame.key = None
+        elif char in self.NUMBER_START:
+            self._number.append(char)
+
+    def _reset(self):
+        """Drop a top-level value that is not an answer"""
+        self._stack = []
+        self._opened = None
+        self._next_entry = 0
+        self._last_string = None
+
+    def _on_number(self):
+        self._number = []
+        frame = self._stack[-1]
+        if frame.kind != '{' or frame.entry is None:
+            return
+        if frame.is_entry and frame.key in self.required:
+            self.scored.add((frame.entry, frame.key))
+        elif frame.key == 'score' and frame.name in self.required and len(self._stack) >= 2 \
+                and self._stack[-2].is_entry:
+            self.scored.add((frame.entry, frame.name))
+
+
+@dataclass
+class StreamResult:
+    texts: List[str]
+    ttft: Optional[float] = None  # Seconds from the request to the first content
+    time_to_score: Optional[float] = None  # Seconds until every required score had arrived
+    cut_off: bool = False  # Closed before the provider finished
+
+
+def read_stream(events: Iterable[Tuple[int, str]], n: int, required: Iterable[str], entries: int = 1,
+                start: Optional[float] = None) -> StreamResult:
+    """Collect (sample index, text delta) events for n samples, stopping once every answer is complete.
+
+    A complete answer normally carries every required score; one that closes
+    without them cannot gain them later either, so it ends its sample too.
+    The caller closes the underlying stream when this returns early.
+    `start` is the time.monotonic() at which the request was sent.
+    """
+    start = time.monotonic() if start is None else start
+    required = list(required)
+    scanners = [StreamingJSONScanner(required, entries) for _ in range(n)]
+    parts: List[List[str]] = [[] for _ in range(n)]
+    result = StreamResult(texts=[])
+
+    for index, text in events:
+        if not text or index >= n:
+            continue
+        if result.ttft is None:
+            result.ttft = time.monotonic() - start
+        scanner = scanners[index]
+        if scanner.complete:
+            continue
+        consumed = scanner.length
+        scanner.feed(text)
+        parts[index].append(text[:scanner.length - consumed])
+        if result.time_to_score is None and all(s.scores_complete for s in scanners):
+            result.time_to_score = time.monotonic() - start
+        if all(s.complete for s in scanners):
+            result.cut_off = True
+            break
+
+    if result.time_to_score is None and result.ttft is not None:
+        result.time_to_score = time.monotonic() - start
+    result.texts = [''.join(p) for p in parts]
+    return result
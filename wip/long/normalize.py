@@ -0,0 +1,117 @@
+"""
+Transcript normalization between the dataloader and prompt construction, to cut input tokens
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.ratelimit import estimate_tokens
+
+NORMALIZATION_STEPS = ('whitespace', 'merge', 'strip-annotations')
+
+_SPACES = re.compile(r' {2,}')
+_PADDED_TAB = re.compile(r' *\t *')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class NormalizationConfig:
+    """Which normalization steps to apply"""
+    collapse_whitespace: bool = True
+    merge_turns: bool = True
+    strip_annotations: bool = False  # Drop intent/score columns from tab-separated transcripts
+
+    @classmethod
+    def from_steps(cls, steps: Iterable[str]) -> 'NormalizationConfig':
+        steps = set(steps)
+        unknown = steps - set(NORMALIZATION_STEPS) - {'all'}
+        if unknown:
+            raise ValueError(f"Unknown normalization steps: {', '.join(sorted(unknown))} "
+                             f"(choose from {', '.join(NORMALIZATION_STEPS)}, all)")
+        if 'all' in steps:
+            steps = set(NORMALIZATION_STEPS)
+        return cls('whitespace' in steps, 'merge' in steps, 'strip-annotations' in steps)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse padding while keeping the line and tab-column structure"""
+    lines = []
+    for line in text.split('\n'):
+        line = _PADDED_TAB.sub('\t', line)
+        lines.append(_SPACES.sub(' ', line).rstrip())
+    return '\n'.join(lines)
+
+
+def _merge_turns(turns: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Join consecutive turns of the same speaker"""
+    merged = []
+    for speaker, text in turns:
+        if merged and merged[-1][0] == speaker:
+            merged[-1] = (speaker, f"{merged[-1][1]} {text}")
+        else:
+            merged.append((speaker, text))
+    return merged
+
+
+def normalize_dialogue(dialogue, config: NormalizationConfig) -> str:
+    """Prompt transcript of a Dialogue ("SPEAKER: text" lines), normalized.
+
+    Dialogue.to_text() carries no annotation columns, so strip_annotations
+    does not apply here.
+    """
+    turns = [(utt.speaker.value, utt.text) for utt in dialogue.utterances]
+    if config.collapse_whitespace:
+        turns = [(speaker, _WHITESPACE.sub(' ', text).strip()) for speaker, text in turns]
+    if config.merge_turns:
+        turns = _merge_turns(turns)
+    return "\n".join(f"{speaker}: {text}" for speaker, text in turns)
+
+
+def normalize_tsv(transcript: str, config: NormalizationConfig) -> str:
+    """Normalize a tab-separated transcript (speaker, text, intent, scores per line)"""
+    if config.collapse_whitespace:
+        transcript = collapse_whitespace(transcript)
+    rows = [line.split('\t') for line in transcript.split('\n') if line.strip()]
+    if config.strip_annotations:
+        rows = [row[:2] for row in rows]
+    if config.merge_turns:
+        # Only plain speaker/text rows can merge; annotated ones keep their own columns
+        merged = []
+        for row in rows:
+            if merged and len(row) == 2 and len(merged[-1]) == 2 and merged[-1][0] == row[0]:
+                merged[-1] = [row[0], f"{merged[-1][1]} {row[1]}"]
+            else:
+                merged.append(row)
+        rows = merged
+    return '\n'.join('\t'.join(row) for row in rows)
+
+
+class TranscriptNormalizer:
+    """Normalizes dialogue transcripts and tallies the input tokens saved per dataset"""
+
+    def __init__(self, config: Optional[NormalizationConfig] = None):
+        self.config = config or NormalizationConfig()
+        self.tokens: Dict[str, List[int]] = {}  # dataset -> [tokens before, tokens after]
+        self._lock = threading.Lock()
+
+    def transcript(self, dialogue, dataset: Optional[str] = None) -> str:
+        text = normalize_dialogue(dialogue, self.config)
+        self.record(dataset or 'unknown', dialogue.to_text(), text)
+        return text
+
+    def record(self, dataset: str, before: str, after: str):
+        before_tokens, after_tokens = estimate_tokens(before), estimate_tokens(after)
+        with self._lock:
+            totals = self.tokens.setdefault(dataset, [0, 0])
+            totals[0] += before_tokens
+            totals[1] += after_tokens
+
+    def report(self) -> List[str]:
+        """One line per dataset: estimated transcript tokens before and after, and the saving"""
+        lines = []
+        for dataset, (before, after) in self.tokens.items():
+            saved = 100.0 * (before - after) / before if before else 0.0
+            lines.append(f"{dataset}: {before:,} -> {after:,} tokens ({saved:.1f}% saved)")
+        return lines
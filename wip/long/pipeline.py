@@ -2,16 +2,26 @@
 Simplified pipeline for CSAT evaluation with multiple iterations - Updated for 7-criteria system with 1-5 scale comparison
 """
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+import threading
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import json
 from datetime import datetime
 
-from dataloader import load_dataset, Language
-from models.base import BaseCSATModel, CSATInput, CSATOutput, CriteriaScore
+from dataloader import Language
+from registry import iter_dialogues
+from sampling import sample_dialogues
+from normalize import TranscriptNormalizer
+from concurrency import InFlightLimiter, AdaptiveLimiter
+from checkpoint import RunJournal, DialogueCheckpoint, dialogue_fingerprint
+from models.retry import is_rate_limited
+from models.base import (CRITERIA, BaseCSATModel, CSATInput, CSATOutput, CriteriaScore, ModelResponse, Prompt,
+                         describe_weights)
 
 
 @dataclass
@@ -49,84 +59,365 @@ class CSATResult:
     mse: Optional[float] = None
     rmse: Optional[float] = None
     r2: Optional[float] = None
+    
+    # Retries spent on each iteration's model call
+    retries: List[int] = field(default_factory=list)
+    
+    # Iterations actually drawn (below num_iterations when stopped early)
+    iterations_used: int = 0
+    
+    # Iterations served from the response cache
+    cache_hits: int = 0
+    
+    # Prompt tokens billed, and those served from the provider's prompt cache
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    
+    # Requests whose provider reported no usage, so prompt_tokens undercounts
+    usage_missing: int = 0
+    
+    # Iterations re-requested on their own because a batch response missed this dialogue
+    batch_fallbacks: int = 0
+    
+    # Iterations whose response did not parse into a complete answer (scored 50 where missing)
+    parse_failures: int = 0
+    
+    # Seconds to the first streamed token, and until every score had arrived, per streamed iteration
+    ttft: List[float] = field(default_factory=list)
+    time_to_score: List[float] = field(default_factory=list)
+
+
+@dataclass
+class EarlyStopping:
+    """Stop drawing iterations once every criterion estimate has converged.
+    
+    A criterion converges when the 95% confidence interval of its mean is
+    within `ci_half_width` points (0-100 scale), or when at least
+    `mode_agreement` of its scores share the most common value. Rules left
+    as None are disabled.
+    """
+    min_iterations: int = 3
+    ci_half_width: Optional[float] = 5.0
+    mode_agreement: Optional[float] = None
+    
+    def converged(self, criteria_scores: Dict[str, List[int]]) -> bool:
+        return all(self._criterion_converged(scores) for scores in criteria_scores.values())
+    
+    def _criterion_converged(self, scores: List[int]) -> bool:
+        if len(scores) < max(2, self.min_iterations):
+            return False
+        if self.ci_half_width is not None:
+            half_width = 1.96 * np.std(scores, ddof=1) / np.sqrt(len(scores))
+            if half_width <= self.ci_half_width:
+                return True
+        if self.mode_agreement is not None:
+            mode_count = max(scores.count(score) for score in set(scores))
+            if mode_count / len(scores) >= self.mode_agreement:
+                return True
+        return False
+
+
+class _BatchCheckpoint:
+    """Stands in for a checkpoint while drawing batch requests: journals each dialogue's share as its iteration"""
+    
+    def __init__(self, pipeline: 'CSATPipeline', checkpoints: List[Optional[DialogueCheckpoint]]):
+        self.pipeline = pipeline
+        self.checkpoints = checkpoints
+        self.responses: Dict[int, ModelResponse] = {}  # Whole batch responses are never journaled
+    
+    def record(self, iteration: int, response: ModelResponse):
+        for checkpoint, share in zip(self.checkpoints, self.pipeline._batch_shares(response, len(self.checkpoints))):
+            if checkpoint is not None and share is not None:
+                checkpoint.record(iteration, share)
 
 
 class CSATPipeline:
     """Main pipeline for CSAT evaluation with 7 criteria"""
     
-    def __init__(self, model: BaseCSATModel, num_iterations: int = 5):
+    def __init__(self, model: BaseCSATModel, num_iterations: int = 5, max_concurrency: int = 1,
+                 limiter: Optional[InFlightLimiter] = None, early_stopping: Optional[EarlyStopping] = None,
+                 normalizer: Optional[TranscriptNormalizer] = None):
         self.model = model
+        # Upper bound on iterations when early stopping is enabled
         self.num_iterations = num_iterations
+        # Max iterations of one dialogue in flight at once (1 = serial)
+        self.max_concurrency = max(1, max_concurrency)
+        # Optional limit on requests in flight, shared with other pipelines
+        self.limiter = limiter
+        self.early_stopping = early_stopping
+        # Optional transcript normalization before prompt construction
+        self.normalizer = normalizer
     
     def _convert_100_to_5_scale(self, score_100: float) -> float:
         """Convert 0-100 scale back to 1-5 scale"""
         score_100 = max(0, min(100, score_100))
         return 1 + (score_100 / 100) * 4  # 0→1, 25→2, 50→3, 75→4, 100→5
     
-    def evaluate_dialogue(self, dialogue, instruction_prompt: str, rule_based_prompt: str = "") -> CSATResult:
-        """Evaluate a single dialogue with multiple iterations"""
-        csat_input = CSATInput(
+    def _generate_samples(self, prompt: str, n: int, start_iteration: int,
+                          checkpoint: Optional[DialogueCheckpoint] = None) -> List[ModelResponse]:
+        """Run one model request for n iterations (n > 1 only where the provider supports it)"""
+        try:
+            if self.limiter is None:
+                responses = self.model.generate_many(prompt, n, start_iteration)
+            else:
+                with self.limiter:
+                    try:
+                        responses = self.model.generate_many(prompt, n, start_iteration)
+                    except Exception as e:
+                        self.limiter.record(None, throttled=is_rate_limited(e))
+                        raise
+                    fresh = [r for r in responses if not r.cached]
+                    if fresh:  # Cache hits say nothing about provider load
+                        self.limiter.record(fresh[0].latency, throttled=sum(r.throttled for r in fresh) > 0)
+            
+            if checkpoint is not None:
+                for offset, response in enumerate(responses):
+                    checkpoint.record(start_iteration + offset, response)
+            return responses
+        except ValueError as e:
+            print(f"Configuration/Language error: {e}")
+            raise e
+        except RuntimeError as e:
+            print(f"API error: {e}")
+            raise e
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            raise RuntimeError(f"Unexpected error during evaluation: {str(e)}") from e
+    
+    def _generate_iterations(self, prompt: str, count: int, start_iteration: int = 0,
+                             checkpoint: Optional[DialogueCheckpoint] = None) -> List[ModelResponse]:
+        """Generate raw responses for `count` iterations, returned in iteration order"""
+        iterations = range(start_iteration, start_iteration + count)
+        journaled = checkpoint.responses if checkpoint is not None else {}
+        
+        # Missing iterations are packed into multi-sample requests where the provider supports it
+        per_request = max(1, self.model.max_samples_per_request)
+        batches_to_run = []
+        for iteration in iterations:
+            if iteration in journaled:
+                continue
+            if batches_to_run and batches_to_run[-1][0] + batches_to_run[-1][1] == iteration \
+                    and batches_to_run[-1][1] < per_request:
+                batches_to_run[-1] = (batches_to_run[-1][0], batches_to_run[-1][1] + 1)
+            else:
+                batches_to_run.append((iteration, 1))
+        
+        if self.max_concurrency == 1 or len(batches_to_run) <= 1:
+            batches = [self._generate_samples(prompt, n, start, checkpoint) for start, n in batches_to_run]
+        else:
+            workers = min(self.max_concurrency, len(batches_to_run))
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = [executor.submit(self._generate_samples, prompt, n, start, checkpoint)
+                       for start, n in batches_to_run]
+            try:
+                batches = [future.result() for future in futures]
+            finally:
+                # On failure, drop requests that have not started yet
+                executor.shutdown(wait=True, cancel_futures=True)
+        
+        responses = dict(journaled)
+        for (start, _), batch in zip(batches_to_run, batches):
+            for offset, response in enumerate(batch):
+                responses[start + offset] = response
+        return [responses[iteration] for iteration in iterations]
+    
+    def _draw(self, prompts: Tuple[Prompt, Prompt], count: int, start_iteration: int,
+              checkpoint: Optional[DialogueCheckpoint] = None) -> List[ModelResponse]:
+        """Generate `count` iterations from (justified prompt, scores-only prompt).
+        
+        Iterations below the model's justified_iterations use the first; the two
+        are the same prompt unless the model is in scores-only mode.
+        """
+        justified, compact = prompts
+        if justified == compact:
+            return self._generate_iterations(justified, count, start_iteration, checkpoint)
+        split = min(max(start_iteration, self.model.justified_iterations), start_iteration + count)
+        return (self._generate_iterations(justified, split - start_iteration, start_iteration, checkpoint)
+                + self._generate_iterations(compact, start_iteration + count - split, split, checkpoint))
+    
+    def _next_draw(self, drawn: int) -> int:
+        """Number of iterations to request next, given how many were already drawn"""
+        remaining = self.num_iterations - drawn
+        if self.early_stopping is None:
+            return remaining
+        if drawn == 0:
+            return min(max(1, self.early_stopping.min_iterations), remaining)
+        # One round of requests at a time, so little is drawn past convergence
+        per_round = max(1, self.model.max_samples_per_request) * self.max_concurrency
+        return min(per_round, remaining)
+    
+    def _csat_input(self, dialogue, instruction_prompt: str, rule_based_prompt: str = "",
+                    dataset_name: Optional[str] = None) -> CSATInput:
+        if self.normalizer is not None:
+            transcript = self.normalizer.transcript(dialogue, dataset_name)
+        else:
+            transcript = dialogue.to_text()
+        return CSATInput(
             instruction_prompt=instruction_prompt,
             rule_based_prompt=rule_based_prompt,
-            dialogue=dialogue.to_text(),
+            dialogue=transcript,
             language=dialogue.language
         )
+    
+    @staticmethod
+    def _criteria_scores(outputs: List[CSATOutput]) -> Dict[str, List[int]]:
+        return {attr: [getattr(output, attr).score for output in outputs] for attr in CRITERIA.values()}
+    
+    def evaluate_dialogue(self, dialogue, instruction_prompt: str, rule_based_prompt: str = "",
+                          checkpoint: Optional[DialogueCheckpoint] = None,
+                          dataset_name: Optional[str] = None) -> CSATResult:
+        """Evaluate a single dialogue with multiple iterations (reusing journaled ones from `checkpoint`)"""
+        csat_input = self._csat_input(dialogue, instruction_prompt, rule_based_prompt, dataset_name)
         
+        # Generate raw responses first to capture JSON (kept in iteration order)
+        prompts = (self.model._construct_prompt(csat_input), self.model._construct_prompt(csat_input, justify=False))
+        responses = []
         outputs = []
-        raw_outputs = []
-        criteria_scores = {
-            'task_success': [],
-            'helpfulness_relevance': [],
-            'faithfulness_accuracy': [],
-            'empathy_politeness': [],
-            'compliance_safety': [],
-            'efficiency_effort': [],
-            'fluency_coherence': [],
-            'overall_experience': []
-        }
         
-        for _ in range(self.num_iterations):
-            try:
-                # Generate raw response first to capture JSON
-                prompt = self.model._construct_prompt(csat_input)
-                raw_response = self.model._generate_response(prompt)
-                raw_outputs.append(raw_response)
-                
-                # Parse the response
-                output = self.model._parse_output(raw_response)
-                outputs.append(output)
-                
-                # Collect scores for each criterion
-                criteria_scores['task_success'].append(output.task_success.score)
-                criteria_scores['helpfulness_relevance'].append(output.helpfulness_relevance.score)
-                criteria_scores['faithfulness_accuracy'].append(output.faithfulness_accuracy.score)
-                criteria_scores['empathy_politeness'].append(output.empathy_politeness.score)
-                criteria_scores['compliance_safety'].append(output.compliance_safety.score)
-                criteria_scores['efficiency_effort'].append(output.efficiency_effort.score)
-                criteria_scores['fluency_coherence'].append(output.fluency_coherence.score)
-                criteria_scores['overall_experience'].append(output.overall_experience.score)
-                
-            except ValueError as e:
-                print(f"Configuration/Language error: {e}")
-                raise e
-            except RuntimeError as e:
-                print(f"API error: {e}")
-                raise e
-            except Exception as e:
-                print(f"Unexpected error: {e}")
-                raise RuntimeError(f"Unexpected error during evaluation: {str(e)}") from e
+        while len(responses) < self.num_iterations:
+            drawn = len(responses)
+            for response in self._draw(prompts, self._next_draw(drawn), drawn, checkpoint):
+                responses.append(response)
+                outputs.append(self.model._parse_output(response.text))
+            
+            if self.early_stopping and self.early_stopping.converged(self._criteria_scores(outputs)):
+                break
+        
+        return self._summarize(dialogue, responses, outputs)
+    
+    def evaluate_batch(self, dialogues: List, instruction_prompt: str, rule_based_prompt: str = "",
+                       dataset_name: Optional[str] = None,
+                       checkpoints: Optional[List[Optional[DialogueCheckpoint]]] = None) -> List[CSATResult]:
+        """Evaluate several dialogues with shared requests, each scoring all of them at once.
+        
+        Dialogues missing or malformed in a batch response are scored for that
+        iteration with a single-dialogue request. With early stopping, converged
+        dialogues leave the batch. Each dialogue's share of a batch response is
+        journaled to its checkpoint as that dialogue's iteration, and journaled
+        iterations are reused rather than batched again.
+        """
+        inputs = [self._csat_input(dialogue, instruction_prompt, rule_based_prompt, dataset_name)
+                  for dialogue in dialogues]
+        checkpoints = checkpoints or [None] * len(dialogues)
+        responses: List[List[ModelResponse]] = [[] for _ in dialogues]
+        outputs: List[List[CSATOutput]] = [[] for _ in dialogues]
+        fallbacks = [0] * len(dialogues)
+        
+        active = list(range(len(dialogues)))
+        drawn = 0
+        while active and drawn < self.num_iterations:
+            count = self._next_draw(drawn)
+            iterations = range(drawn, drawn + count)
+            drawn_now = {idx: {iteration: checkpoints[idx].responses[iteration] for iteration in iterations
+                               if checkpoints[idx] is not None and iteration in checkpoints[idx].responses}
+                         for idx in active}
+            
+            # Consecutive iterations missing from the same dialogues are drawn together
+            groups: List[Tuple[List[int], int, int]] = []
+            for iteration in iterations:
+                members = [idx for idx in active if iteration not in drawn_now[idx]]
+                if not members:
+                    continue
+                if groups and groups[-1][0] == members and groups[-1][1] + groups[-1][2] == iteration:
+                    groups[-1] = (members, groups[-1][1], groups[-1][2] + 1)
+                else:
+                    groups.append((members, iteration, 1))
+            for members, start, n in groups:
+                for idx, shares in self._draw_batch(inputs, members, start, n, checkpoints, fallbacks).items():
+                    drawn_now[idx].update(shares)
+            
+            for idx in active:
+                for iteration in iterations:
+                    responses[idx].append(drawn_now[idx][iteration])
+                    outputs[idx].append(self.model._parse_output(drawn_now[idx][iteration].text))
+            
+            drawn += count
+            if self.early_stopping:
+                active = [idx for idx in active
+                          if not self.early_stopping.converged(self._criteria_scores(outputs[idx]))]
+        
+        results = []
+        for idx, dialogue in enumerate(dialogues):
+            result = self._summarize(dialogue, responses[idx], outputs[idx])
+            result.batch_fallbacks = fallbacks[idx]
+            results.append(result)
+        return results
+    
+    def _draw_batch(self, inputs: List[CSATInput], members: List[int], start: int, count: int,
+                    checkpoints: List[Optional[DialogueCheckpoint]],
+                    fallbacks: List[int]) -> Dict[int, Dict[int, ModelResponse]]:
+        """Draw iterations start..start+count-1 for `members` (indices into `inputs`) in batch requests.
+        
+        Returns each member's responses by iteration, after journaling them to its checkpoint.
+        """
+        if len(members) == 1:
+            idx = members[0]
+            prompts = (self.model._construct_prompt(inputs[idx]),
+                       self.model._construct_prompt(inputs[idx], justify=False))
+            return {idx: dict(zip(range(start, start + count), self._draw(prompts, count, start, checkpoints[idx])))}
+        
+        group = [inputs[idx] for idx in members]
+        prompts = (self.model._construct_batch_prompt(group), self.model._construct_batch_prompt(group, justify=False))
+        # Shares are journaled as each request returns, so an interruption keeps the finished ones
+        journal = _BatchCheckpoint(self, [checkpoints[idx] for idx in members])
+        shares_by_member: Dict[int, Dict[int, ModelResponse]] = {idx: {} for idx in members}
+        for offset, response in enumerate(self._draw(prompts, count, start, journal)):
+            iteration = start + offset
+            for idx, share in zip(members, self._batch_shares(response, len(members))):
+                if share is None:
+                    single = self.model._construct_prompt(inputs[idx],
+                                                          justify=iteration < self.model.justified_iterations)
+                    share = self._generate_iterations(single, 1, iteration, checkpoints[idx])[0]
+                    fallbacks[idx] += 1
+                shares_by_member[idx][iteration] = share
+        return shares_by_member
+    
+    def _batch_shares(self, response: ModelResponse, k: int) -> List[Optional[ModelResponse]]:
+        """Each dialogue's share of a batch response, with its own answer as text; None where it is missing"""
+        texts = self.model._split_batch_output(response.text, k)
+        shares = []
+        for position, share in enumerate(self._split_response(response, k), 1):
+            if position in texts:
+                share.text = texts[position]
+                shares.append(share)
+            else:
+                shares.append(None)
+        return shares
+    
+    @staticmethod
+    def _split_response(response: ModelResponse, k: int) -> List[ModelResponse]:
+        """Per-dialogue copies of a batch response; call statistics go to the first, tokens are shared out"""
+        shares = []
+        for i in range(k):
+            # The first dialogue also takes the remainder, so the totals are unchanged
+            prompt_tokens = response.prompt_tokens // k + (response.prompt_tokens % k if i == 0 else 0)
+            cached_tokens = response.cached_tokens // k + (response.cached_tokens % k if i == 0 else 0)
+            shares.append(ModelResponse(
+                text=response.text, retries=response.retries if i == 0 else 0,
+                throttled=response.throttled if i == 0 else 0, latency=response.latency,
+                cached=response.cached, prompt_tokens=prompt_tokens, cached_tokens=cached_tokens,
+                usage_missing=response.usage_missing and i == 0,
+                ttft=response.ttft, time_to_score=response.time_to_score
+            ))
+        return shares
+    
+    def _summarize(self, dialogue, responses: List[ModelResponse], outputs: List[CSATOutput]) -> CSATResult:
+        """Aggregate a dialogue's parsed iterations into its result"""
+        criteria_scores = self._criteria_scores(outputs)
+        raw_outputs = [response.text for response in responses]
         
         # Calculate averages and variances
         averages = {k: float(np.mean(v)) for k, v in criteria_scores.items()}
         variances = {k: float(np.var(v)) for k, v in criteria_scores.items()}
         
-        # Select best explanations (closest to average score)
+        # Select best explanations (closest to average score, among iterations that gave one)
         best_explanations = {}
         for criterion in criteria_scores.keys():
             if outputs:
                 scores = criteria_scores[criterion]
                 avg_score = averages[criterion]
-                best_idx = np.argmin(np.abs(np.array(scores) - avg_score))
+                justified = [i for i, output in enumerate(outputs) if getattr(output, criterion).justification]
+                best_idx = min(justified or range(len(outputs)), key=lambda i: abs(scores[i] - avg_score))
                 
                 if best_idx < len(outputs):
                     output = outputs[best_idx]
@@ -181,55 +472,241 @@ class CSATPipeline:
             mae=mae,
             mse=mse,
             rmse=rmse,
-            r2=r2
+            r2=r2,
+            retries=[response.retries for response in responses],
+            iterations_used=len(responses),
+            cache_hits=sum(1 for response in responses if response.cached),
+            prompt_tokens=sum(response.prompt_tokens for response in responses),
+            cached_prompt_tokens=sum(response.cached_tokens for response in responses),
+            usage_missing=sum(1 for response in responses if response.usage_missing),
+            parse_failures=sum(1 for output in outputs if output.parse_error),
+            ttft=[response.ttft for response in responses if response.ttft is not None and not response.cached],
+            time_to_score=[response.time_to_score for response in responses
+                           if response.time_to_score is not None and not response.cached]
         )
 
 
+class ExperimentStopped(RuntimeError):
+    """Raised by dialogue workers once the experiment has been asked to stop"""
+
+
 class DatasetExperiment:
     """Run experiments on datasets with 7-criteria evaluation"""
     
-    def __init__(self, models: List[BaseCSATModel], num_iterations: int = 5):
+    # Ceiling for adaptive limiters when no concurrency is configured
+    DEFAULT_ADAPTIVE_MAX = 32
+    
+    def __init__(self, models: List[BaseCSATModel], num_iterations: int = 5, iteration_concurrency: int = 1,
+                 concurrency: Optional[int] = None, model_concurrency: Optional[Dict[str, int]] = None,
+                 adaptive: bool = False, early_stopping: Optional[EarlyStopping] = None,
+                 journal: Optional[RunJournal] = None, sampling: str = 'reservoir', seed: int = 42,
+                 normalizer: Optional[TranscriptNormalizer] = None, batch_size: int = 1):
         self.models = models
         self.num_iterations = num_iterations
+        self.iteration_concurrency = iteration_concurrency
+        self.early_stopping = early_stopping
+        # Global in-flight request limit; None keeps dialogues serial
+        self.concurrency = concurrency
+        self.limiter = InFlightLimiter(concurrency) if concurrency and not adaptive else None
+        # Per-model budgets (keyed by lowercase model name) get their own limiter
+        self.model_concurrency = {k.lower(): v for k, v in (model_concurrency or {}).items()}
+        self.model_limiters = {
+            m.model_name: InFlightLimiter(self.model_concurrency[m.model_name.lower()])
+            for m in models if m.model_name.lower() in self.model_concurrency
+        }
+        if adaptive:
+            # Every provider finds its own limit, capped by its budget or the global limit
+            self.model_limiters = {
+                m.model_name: AdaptiveLimiter(self.model_concurrency.get(
+                    m.model_name.lower(), concurrency or self.DEFAULT_ADAPTIVE_MAX))
+                for m in models
+            }
+        # Completed work is journaled as it finishes and skipped when resuming
+        self.journal = journal
+        # Dialogue subsets are drawn with a local RNG, so global random state is untouched
+        self.sampling = sampling
+        self.seed = seed
+        self.normalizer = normalizer
+        # Dialogues scored per request (1 = one dialogue per prompt)
+        self.batch_size = max(1, batch_size)
         self.results = {}
+        # Each dataset's sample, drawn once and shared by the models run on it
+        self._samples: Dict[str, List] = {}
+        self._samples_lock = threading.Lock()
+        # Set on Ctrl-C; workers check it between dialogues and stop
+        self.stop = threading.Event()
     
     def _convert_100_to_5_scale(self, score_100: float) -> float:
         """Convert 0-100 scale back to 1-5 scale"""
         score_100 = max(0, min(100, score_100))
         return 1 + (score_100 / 100) * 4
     
+    def _sample(self, dataset_name: str, sample_size: int) -> List:
+        """The dataset's sample, drawn in one pass over its stream the first time it is asked for"""
+        with self._samples_lock:
+            if dataset_name not in self._samples:
+                self._samples[dataset_name] = list(sample_dialogues(iter_dialogues(dataset_name), sample_size,
+                                                                    self.sampling, self.seed))
+            return self._samples[dataset_name]
+    
     def run_on_dataset_with_progress(self, dataset_name: str, instruction_prompt: str, 
                                    rule_based_prompt: str = "", sample_size: Optional[int] = None, 
                                    verbose: bool = True, model: BaseCSATModel = None, 
                                    progress_callback=None):
         """Run experiment on a dataset with progress tracking"""
-        dialogues = load_dataset(dataset_name)
-        if sample_size and sample_size < len(dialogues):
-            import random
-            random.seed(42)
-            dialogues = random.sample(dialogues, sample_size)
+        dialogues = None
+        if sample_size:
+            dialogues = self._sample(dataset_name, sample_size)
         
         models_to_run = [model] if model else self.models
         
         for current_model in models_to_run:
-            pipeline = CSATPipeline(current_model, self.num_iterations)
-            model_results = []
-            
-            for dialogue in dialogues:
-                result = pipeline.evaluate_dialogue(dialogue, instruction_prompt, rule_based_prompt)
-                model_results.append(result)
-                
-                if progress_callback:
-                    progress_callback()
+            if sample_size is None:
+                # Full runs stream the file instead of holding every dialogue in memory
+                dialogues = iter_dialogues(dataset_name)
+            limiter = self.get_limiter(current_model.model_name)
+            pipeline = CSATPipeline(current_model, self.num_iterations, self.iteration_concurrency, limiter,
+                                    self.early_stopping, self.normalizer)
+            # Enough dialogue workers to fill the limiter's ceiling
+            model_results = self._evaluate_dialogues(pipeline, dataset_name, dialogues, instruction_prompt,
+                                                     rule_based_prompt, limiter.max_limit if limiter else None,
+                                                     progress_callback)
             
             key = f"{current_model.model_name}_{dataset_name}"
             self.results[key] = {
                 'model_name': current_model.model_name,
                 'dataset': dataset_name,
                 'results': model_results,
-                'metrics': self._calculate_metrics(model_results)
+                'metrics': self._calculate_metrics(model_results),
+                # Set when OverallExperience was computed locally rather than scored by the model
+                'overall_weights': current_model.overall_weights if current_model.scores_only else None
             }
     
+    def get_limiter(self, model_name: str) -> Optional[InFlightLimiter]:
+        """In-flight limiter used for a model's requests (None when unlimited and serial)"""
+        return self.model_limiters.get(model_name, self.limiter)
+    
+    def _evaluate_dialogue(self, pipeline: CSATPipeline, dataset_name: str, dialogue_id: int, dialogue,
+                           instruction_prompt: str, rule_based_prompt: str = "") -> CSATResult:
+        """Evaluate one dialogue, resuming from and writing to the run journal when there is one"""
+        if self.journal is None:
+            return pipeline.evaluate_dialogue(dialogue, instruction_prompt, rule_based_prompt,
+                                              dataset_name=dataset_name)
+        
+        model_name = pipeline.model.model_name
+        fingerprint = dialogue_fingerprint(dialogue)
+        saved = self.journal.dialogue_result(model_name, dataset_name, dialogue_id, fingerprint)
+        if saved is not None:
+            return CSATResult(**saved)
+        
+        checkpoint = self.journal.checkpoint(model_name, dataset_name, dialogue_id, fingerprint)
+        result = pipeline.evaluate_dialogue(dialogue, instruction_prompt, rule_based_prompt, checkpoint, dataset_name)
+        self.journal.record_dialogue(model_name, dataset_name, dialogue_id, fingerprint, asdict(result))
+        return result
+    
+    def _evaluate_batch(self, pipeline: CSATPipeline, dataset_name: str, start_id: int, dialogues: List,
+                        instruction_prompt: str, rule_based_prompt: str = "") -> List[CSATResult]:
+        """Evaluate consecutive dialogues in shared batch requests; journaled ones are not sent again"""
+        if self.stop.is_set():
+            raise ExperimentStopped("Experiment stopped")
+        if len(dialogues) == 1:
+            return [self._evaluate_dialogue(pipeline, dataset_name, start_id, dialogues[0],
+                                            instruction_prompt, rule_based_prompt)]
+        
+        model_name = pipeline.model.model_name
+        results = {}
+        fingerprints = {}
+        for offset, dialogue in enumerate(dialogues):
+            if self.journal is None:
+                fingerprints[offset] = None
+                continue
+            fingerprint = dialogue_fingerprint(dialogue)
+            saved = self.journal.dialogue_result(model_name, dataset_name, start_id + offset, fingerprint)
+            if saved is not None:
+                results[offset] = CSATResult(**saved)
+            else:
+                fingerprints[offset] = fingerprint
+        
+        todo = sorted(fingerprints)
+        if todo:
+            checkpoints = None
+            if self.journal is not None:
+                checkpoints = [self.journal.checkpoint(model_name, dataset_name, start_id + offset,
+                                                       fingerprints[offset]) for offset in todo]
+            batch_results = pipeline.evaluate_batch([dialogues[offset] for offset in todo], instruction_prompt,
+                                                    rule_based_prompt, dataset_name, checkpoints)
+            for offset, result in zip(todo, batch_results):
+                results[offset] = result
+                if self.journal is not None:
+                    self.journal.record_dialogue(model_name, dataset_name, start_id + offset,
+                                                 fingerprints[offset], asdict(result))
+        return [results[offset] for offset in range(len(dialogues))]
+    
+    def _batches(self, dialogues: Iterable) -> Iterator[Tuple[int, List]]:
+        """(index of first dialogue, dialogues) groups of up to batch_size, read lazily"""
+        iterator = iter(dialogues)
+        start = 0
+        while True:
+            group = list(islice(iterator, self.batch_size))
+            if not group:
+                return
+            yield start, group
+            start += len(group)
+    
+    def _evaluate_dialogues(self, pipeline: CSATPipeline, dataset_name: str, dialogues, instruction_prompt: str,
+                            rule_based_prompt: str = "", concurrency: Optional[int] = None,
+                            progress_callback=None) -> List[CSATResult]:
+        """Evaluate dialogues, in parallel when a concurrency limit is set, keeping dialogue order.
+
+        `dialogues` may be any iterable; it is consumed lazily, batch_size dialogues at a time.
+        """
+        if not concurrency or concurrency == 1:
+            model_results = []
+            for start, group in self._batches(dialogues):
+                for result in self._evaluate_batch(pipeline, dataset_name, start, group,
+                                                   instruction_prompt, rule_based_prompt):
+                    model_results.append(result)
+                    
+                    if progress_callback:
+                        progress_callback()
+            return model_results
+        
+        # Workers only wait on the shared limiter, so in-flight requests never exceed it.
+        # Batches are submitted in a bounded window so the iterable is never read far ahead.
+        results_by_idx = {}
+        pending = {}
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            for start, group in self._batches(dialogues):
+                if len(pending) >= 2 * concurrency:
+                    self._collect_finished(pending, results_by_idx, progress_callback)
+                future = executor.submit(self._evaluate_batch, pipeline, dataset_name, start, group,
+                                         instruction_prompt, rule_based_prompt)
+                pending[future] = start
+            while pending:
+                self._collect_finished(pending, results_by_idx, progress_callback)
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                self.stop.set()
+            # Queued batches are dropped; once stopping, dialogues in flight are not waited for
+            executor.shutdown(wait=not self.stop.is_set(), cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+        
+        return [results_by_idx[idx] for idx in range(len(results_by_idx))]
+    
+    @staticmethod
+    def _collect_finished(pending, results_by_idx, progress_callback=None):
+        """Wait for at least one pending batch and store its finished results by dialogue index"""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            start = pending.pop(future)
+            for offset, result in enumerate(future.result()):
+                results_by_idx[start + offset] = result
+                
+                if progress_callback:
+                    progress_callback()
+    
     def _calculate_metrics(self, results: List[CSATResult]) -> Dict[str, float]:
         """Calculate evaluation metrics"""
         # Get predictions (convert 0-100 to 1-5) and ground truths (already 1-5)
@@ -246,8 +723,27 @@ class DatasetExperiment:
         
         metrics = {
             'avg_predicted_score': float(np.mean([r.overall_experience_avg for r in results])),
-            'avg_variance': float(np.mean([r.overall_experience_variance for r in results]))
+            'avg_variance': float(np.mean([r.overall_experience_variance for r in results])),
+            'total_retries': int(sum(sum(r.retries) for r in results)),
+            'avg_iterations_used': float(np.mean([r.iterations_used for r in results])),
+            'iterations_saved': int(sum(self.num_iterations - r.iterations_used for r in results)),
+            'cache_hits': int(sum(r.cache_hits for r in results)),
+            'prompt_tokens': int(sum(r.prompt_tokens for r in results)),
+            'cached_prompt_tokens': int(sum(r.cached_prompt_tokens for r in results)),
+            'usage_missing': int(sum(r.usage_missing for r in results)),
+            'batch_fallbacks': int(sum(r.batch_fallbacks for r in results)),
+            'parse_failures': int(sum(r.parse_failures for r in results))
         }
+        # No prompt tokens means the provider reported no usage (e.g. streams closed before the usage
+        # chunk), not that nothing was cached
+        metrics['prompt_cache_rate'] = (metrics['cached_prompt_tokens'] / metrics['prompt_tokens']
+                                        if metrics['prompt_tokens'] else float('nan'))
+        iterations = sum(r.iterations_used for r in results)
+        metrics['parse_failure_rate'] = metrics['parse_failures'] / iterations if iterations else 0.0
+        ttft = [t for r in results for t in r.ttft]
+        if ttft:
+            metrics['avg_ttft'] = float(np.mean(ttft))
+            metrics['avg_time_to_score'] = float(np.mean([t for r in results for t in r.time_to_score]))
         
         if ground_truths_1_5:
             predictions_1_5 = np.array(predictions_1_5)
@@ -295,7 +791,10 @@ class DatasetExperiment:
                 'Correlation': metrics.get('correlation', np.nan),
                 'Avg_Pred_1_5': metrics.get('avg_pred_1_5', np.nan),
                 'Avg_GT_1_5': metrics.get('avg_gt_1_5', np.nan),
-                'Avg_Variance': metrics.get('avg_variance', np.nan)
+                'Avg_Variance': metrics.get('avg_variance', np.nan),
+                'Avg_Iterations': metrics.get('avg_iterations_used', np.nan),
+                'Prompt_Cache_Rate': metrics.get('prompt_cache_rate', np.nan),
+                'Parse_Failure_Rate': metrics.get('parse_failure_rate', np.nan)
             })
         return pd.DataFrame(summary_data)
     
@@ -326,6 +825,7 @@ class DatasetExperiment:
                         raw_outputs_data.append({
                             'dialogue_id': i,
                             'iteration': j,
+                            'retries': r.retries[j] if j < len(r.retries) else 0,
                             'raw_output': raw_output
                         })
                 
@@ -335,6 +835,8 @@ class DatasetExperiment:
                 # Save detailed text report
                 with open(output_path / f"{dataset_name}_detailed.txt", 'w', encoding='utf-8') as f:
                     f.write(f"Model: {model_name} | Dataset: {dataset_name}\n")
+                    if result.get('overall_weights'):
+                        f.write(f"OverallExperience: computed locally, {describe_weights(result['overall_weights'])}\n")
                     f.write("="*80 + "\n\n")
                     
                     metrics = result['metrics']
@@ -347,7 +849,25 @@ class DatasetExperiment:
                     f.write(f"Correlation: {metrics.get('correlation', 0):.3f}\n")
                     f.write(f"Avg Prediction (1-5): {metrics.get('avg_pred_1_5', 0):.2f}\n")
                     f.write(f"Avg Ground Truth (1-5): {metrics.get('avg_gt_1_5', 0):.2f}\n")
-                    f.write(f"Avg Variance: {metrics.get('avg_variance', 0):.3f}\n\n")
+                    f.write(f"Avg Variance: {metrics.get('avg_variance', 0):.3f}\n")
+                    f.write(f"API Retries: {metrics.get('total_retries', 0)}\n")
+                    f.write(f"Avg Iterations Used: {metrics.get('avg_iterations_used', 0):.2f} / {self.num_iterations}"
+                            f" (saved {metrics.get('iterations_saved', 0)})\n")
+                    f.write(f"Cached Iterations: {metrics.get('cache_hits', 0)}\n")
+                    if metrics.get('prompt_tokens'):
+                        missing = (f", no usage reported for {metrics['usage_missing']} requests"
+                                   if metrics.get('usage_missing') else "")
+                        f.write(f"Prompt Tokens: {metrics['prompt_tokens']:,} "
+                                f"({metrics['prompt_cache_rate']:.1%} from provider prompt cache{missing})\n")
+                    else:
+                        f.write("Prompt Tokens: n/a (no usage reported)\n")
+                    f.write(f"Batch Fallbacks: {metrics.get('batch_fallbacks', 0)}\n")
+                    f.write(f"Parse Failures: {metrics.get('parse_failures', 0)} "
+                            f"({metrics.get('parse_failure_rate', 0):.1%} of iterations)\n")
+                    if 'avg_ttft' in metrics:
+                        f.write(f"Avg TTFT: {metrics['avg_ttft']:.2f}s, "
+                                f"Avg Time to Complete Score: {metrics['avg_time_to_score']:.2f}s\n")
+                    f.write("\n")
                     
                     f.write(f"Sample Results ({len(result['results'])} total):\n")
                     f.write("="*60 + "\n")
@@ -387,6 +907,7 @@ class DatasetExperiment:
                         'mse': r.mse,
                         'rmse': r.rmse,
                         'variance': r.overall_experience_variance,
+                        'iterations_used': r.iterations_used,
                         'explanation': r.best_explanations.get('overall_experience', '')[:200]
                     })
                 
@@ -492,9 +1013,11 @@ class CSATAnalyzer:
             report.extend([
                 f"\n{'='*60}",
                 f"Model: {result['model_name']} | Dataset: {result['dataset']}",
-                f"{'='*60}",
-                "\nMetrics (1-5 Scale):"
+                f"{'='*60}"
             ])
+            if result.get('overall_weights'):
+                report.append(f"OverallExperience: computed locally, {describe_weights(result['overall_weights'])}")
+            report.append("\nMetrics (1-5 Scale):")
             
             metrics = result['metrics']
             report.append(f"  MAE: {metrics.get('mae', 0):.4f}")
@@ -0,0 +1,151 @@
+"""
+Dataset registry: every dataset, TXT or JSON, as the same lazily loaded Dialogue stream
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from dataloader import (Dialogue, Language, Speaker, Utterance, cached_dataset, get_index, iter_dataset,
+                        load_dataset, open_text)
+
+
+@dataclass
+class DatasetSpec:
+    """Where a dataset lives and how to read it"""
+    name: str
+    format: str  # 'txt' (tab-separated sessions) or 'json' (selected_dialogues.json layout)
+    language: Language
+    description: str = ''
+    path: Optional[Path] = None  # Resolved from dataset/ by name when unset (txt only)
+
+
+REGISTRY: Dict[str, DatasetSpec] = {}
+
+
+def register_dataset(spec: DatasetSpec):
+    REGISTRY[spec.name] = spec
+
+
+register_dataset(DatasetSpec('JDDC', 'txt', Language.CHINESE, 'Chinese E-commerce Customer Service'))
+register_dataset(DatasetSpec('MWOZ', 'txt', Language.ENGLISH, 'English Multi-domain Task-oriented'))
+register_dataset(DatasetSpec('CCPE', 'txt', Language.ENGLISH, 'English Movie Preference Conversations'))
+register_dataset(DatasetSpec('SELECTED', 'json', Language.ENGLISH, 'Hand-picked CCPE dialogues (standalone)',
+                             Path(__file__).parent / 'standalone' / 'selected_dialogues.json'))
+
+
+def get_spec(name: str) -> DatasetSpec:
+    if name not in REGISTRY:
+        raise KeyError(f"Unknown dataset: {name} (registered: {', '.join(REGISTRY)})")
+    return REGISTRY[name]
+
+
+def iter_json_records(path, key: str = 'dialogues', chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Stream the objects of a JSON array one at a time.
+
+    The array is either the top-level value or the value of `key` in the
+    top-level object. Only the record being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open_text(path) as f:
+        buffer, pos = '', 0
+
+        def more() -> bool:
+            """Append the next chunk, dropping what has been consumed; False at end of input"""
+            nonlocal buffer, pos
+            chunk = f.read(chunk_size)
+            buffer, pos = buffer[pos:] + chunk, 0
+            return bool(chunk)
+
+        def skip(chars: str) -> str:
+            """Skip whitespace and `chars`; return the next character ('' at end of input)"""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in chars):
+                    pos += 1
+                if pos < len(buffer) or not more():
+                    return buffer[pos] if pos < len(buffer) else ''
+
+        # Find the opening bracket of the array
+        if skip('') == '{':
+            marker = f'"{key}"'
+            while marker not in buffer[pos:] and more():
+                pass
+            start = buffer.find(marker, pos)
+            if start < 0:
+                raise ValueError(f"No '{key}' array in {path}")
+            pos = start + len(marker)
+            skip(':')
+        if skip('') != '[':
+            raise ValueError(f"Expected a JSON array in {path}")
+        pos += 1
+
+        while True:
+            char = skip(',')
+            if char == ']':
+                return
+            if not char:
+                raise ValueError(f"Unterminated JSON array in {path}")
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if not more():
+                        raise
+            pos = end
+            yield record
+
+
+def dialogue_from_record(record: Dict[str, Any], language: Language) -> Dialogue:
+    """Dialogue from a selected_dialogues.json record (turns with speaker, text, intent, scores)"""
+    utterances = [
+        Utterance(
+            speaker=Speaker(turn['speaker']),
+            text=turn['text'].strip(),
+            action=turn.get('intent') or None,
+            satisfaction_scores=list(turn.get('scores') or [])
+        )
+        for turn in record['turns']
+    ]
+    return Dialogue(
+        utterances=utterances,
+        overall_satisfaction=record.get('overall_scores'),
+        explanations=None,
+        language=language,
+        dialogue_id=record.get('dialogue_id')
+    )
+
+
+def iter_dialogues(name: str) -> Iterator[Dialogue]:
+    """Stream a registered dataset's dialogues with bounded memory.
+    
+    TXT datasets already in the parsed-dataset cache are read from it instead of parsed again.
+    """
+    spec = get_spec(name)
+    if spec.format == 'txt':
+        cached = cached_dataset(name)
+        return iter(cached) if cached is not None else iter_dataset(name)
+    return (dialogue_from_record(record, spec.language) for record in iter_json_records(spec.path))
+
+
+def count_dialogues(name: str) -> int:
+    """Number of dialogues in a registered dataset, without holding them all in memory"""
+    if get_spec(name).format == 'txt':
+        cached = cached_dataset(name, read_disk=False)
+        if cached is not None:
+            return len(cached)
+        try:
+            return len(get_index(name))
+        except ValueError:
+            pass  # Compressed file; no index, so count the stream
+    return sum(1 for _ in iter_dialogues(name))
+
+
+def load_dialogues(name: str) -> List[Dialogue]:
+    """All dialogues of a registered dataset (TXT ones come from the parsed-dataset cache)"""
+    if get_spec(name).format == 'txt':
+        return load_dataset(name)
+    return list(iter_dialogues(name))
+
@@ -3,15 +3,24 @@ Main script to run CSAT evaluation experiments - Simplified for 7-criteria syste
 """
 
 import argparse
+import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
 from tqdm import tqdm
 
 from models.implementations import ChatGPTModel, GeminiModel, QwenModel, MistralModel
-from pipeline import DatasetExperiment
+from models.base import OVERALL_WEIGHTS, describe_weights
+from pipeline import DatasetExperiment, EarlyStopping
+from models.cache import ResponseCache
+from checkpoint import RunJournal
+from sampling import SAMPLING_METHODS
+from registry import REGISTRY, count_dialogues
+from normalize import NORMALIZATION_STEPS, NormalizationConfig, TranscriptNormalizer
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,29 +31,70 @@ class Config:
     models: List[str]
     datasets: List[str]
     sample_size: int
+    sampling: str
+    seed: int
     iterations: int
+    iteration_concurrency: int
+    concurrency: Optional[int]
+    model_concurrency: Dict[str, int]
+    rpm: Dict[str, int]
+    tpm: Dict[str, int]
+    adaptive_concurrency: bool
+    min_iterations: int
+    early_stop_ci: Optional[float]
+    early_stop_agreement: Optional[float]
+    normalize: List[str]
+    batch_size: int
+    output_mode: str
+    justified_iterations: int
+    stream: bool
+    structured_output: bool
+    cache: Optional[str]
+    cache_max_size_mb: Optional[float]
+    cache_max_age_days: Optional[float]
     output_dir: str
     plot: bool
     verbose: bool
+    resume: Optional[str] = None
 
 
-def get_models(selected: List[str]) -> List:
-    """Initialize and return available models"""
-    model_configs = {
-        'chatgpt': (ChatGPTModel, "ChatGPT", {'api_key': os.getenv('OPENAI_API_KEY'), 'model_version': 'gpt-4o'}),
-        'gemini': (GeminiModel, "Gemini", {'api_key': os.getenv('GEMINI_API_KEY'), 'model_version': 'gemini-2.0-flash'}),
-        'qwen': (QwenModel, "Qwen", {'api_key': os.getenv('QWEN_API_KEY'), 'model_version': 'qwen3-30b-a3b-instruct-2507'}),
+# Settings that determine a run's results; --resume restores them from the run's config
+RESUMED_FIELDS = ('models', 'datasets', 'sample_size', 'sampling', 'seed', 'iterations', 'min_iterations',
+                  'early_stop_ci', 'early_stop_agreement', 'normalize', 'batch_size', 'output_mode',
+                  'justified_iterations', 'structured_output', 'output_dir')
+
+
+def model_configs(rpm: Optional[Dict[str, int]] = None, tpm: Optional[Dict[str, int]] = None) -> Dict[str, Tuple]:
+    """(class, display name, config) of every model by CLI name, without creating clients.
+    
+    rpm/tpm are optional per-API-key rate limit budgets keyed by model (chatgpt, gemini, ...);
+    without them no client-side rate limiting is applied. See the README for tier values.
+    """
+    # max_output_tokens is the model's output limit, which batched requests are capped at
+    configs = {
+        'chatgpt': (ChatGPTModel, "ChatGPT", {'api_key': os.getenv('OPENAI_API_KEY'), 'model_version': 'gpt-4o',
+                                              'max_output_tokens': 16384}),
+        'gemini': (GeminiModel, "Gemini", {'api_key': os.getenv('GEMINI_API_KEY'), 'model_version': 'gemini-2.0-flash',
+                                           'max_output_tokens': 8192}),
+        'qwen': (QwenModel, "Qwen", {'api_key': os.getenv('QWEN_API_KEY'), 'model_version': 'qwen3-30b-a3b-instruct-2507',
+                                     'max_output_tokens': 32768}),
         'mistral': (MistralModel, "Mistral", {'api_key': os.getenv('MISTRAL_API_KEY'), 'model_version': 'mistral-small-latest'})
     }
     
     # Add default config
-    for name, (cls, model_name, config) in model_configs.items():
-        config.update({'temperature': 0.3, 'max_tokens': 2000})
-    
+    for name, (cls, model_name, config) in configs.items():
+        config.update({'temperature': 0.3, 'max_tokens': 2000,
+                       'rpm': (rpm or {}).get(name), 'tpm': (tpm or {}).get(name)})
+    return configs
+
+
+def get_models(selected: List[str], rpm: Optional[Dict[str, int]] = None,
+               tpm: Optional[Dict[str, int]] = None) -> List:
+    """Initialize and return available models (rpm/tpm as in model_configs)"""
     models = []
     failed_models = []
     
-    for name, (cls, model_name, config) in model_configs.items():
+    for name, (cls, model_name, config) in model_configs(rpm, tpm).items():
         if 'all' in selected or name in selected:
             try:
                 if not config.get('api_key'):
@@ -72,13 +122,58 @@ def get_models(selected: List[str]) -> List:
     return models
 
 
+class ModelProgress:
+    """Shared progress bar that also reports progress per model"""
+    
+    def __init__(self, total: int, model_totals: Dict[str, int], limiters: Optional[Dict[str, object]] = None):
+        self.pbar = tqdm(total=total, desc="Processing", unit="eval")
+        self.model_totals = model_totals
+        self.model_done = {name: 0 for name in model_totals}
+        # In-flight limiters per model; their current limit is shown next to the counts
+        self.limiters = limiters or {}
+        self._lock = threading.Lock()
+    
+    def completed(self, model_name: str) -> int:
+        with self._lock:
+            return self.model_done[model_name]
+    
+    def update(self, model_name: str, n: int = 1):
+        with self._lock:
+            self.model_done[model_name] += n
+            self.pbar.update(n)
+            self.pbar.set_postfix_str(" | ".join(
+                self._model_status(name, total) for name, total in self.model_totals.items()
+            ))
+    
+    def _model_status(self, name: str, total: int) -> str:
+        status = f"{name} {self.model_done[name]}/{total}"
+        limiter = self.limiters.get(name)
+        if limiter is not None:
+            status += f" c={limiter.limit}"
+        return status
+    
+    def write(self, message: str):
+        with self._lock:
+            self.pbar.write(message)
+    
+    def close(self):
+        self.pbar.close()
+
+
 def get_dataset_info():
     """Dataset information"""
-    return {
-        'JDDC': 'Chinese E-commerce Customer Service',
-        'MWOZ': 'English Multi-domain Task-oriented',
-        'CCPE': 'English Movie Preference Conversations'
-    }
+    return {name: spec.description for name, spec in REGISTRY.items()}
+
+
+def parse_model_budgets(values: Optional[List[str]], option: str = '--model-concurrency') -> Dict[str, int]:
+    """Parse MODEL=N pairs into per-model budgets"""
+    budgets = {}
+    for value in values or []:
+        name, sep, limit = value.partition('=')
+        if not sep or not limit.isdigit() or int(limit) < 1:
+            raise ValueError(f"Invalid {option} value '{value}', expected MODEL=N")
+        budgets[name.strip().lower()] = int(limit)
+    return budgets
 
 
 def create_output_directory_name(timestamp: int, model_name: str, model_version: str, 
@@ -112,7 +207,36 @@ def run_experiment(config: Config):
     print(f"Models: {config.models}")
     print(f"Datasets: {config.datasets}")
     print(f"Sample size: {config.sample_size or 'All'}")
+    if config.sample_size:
+        print(f"Sampling: {config.sampling} (seed {config.seed})")
     print(f"Iterations: {config.iterations}")
+    early_stopping = None
+    if config.early_stop_ci is not None or config.early_stop_agreement is not None:
+        early_stopping = EarlyStopping(config.min_iterations, config.early_stop_ci, config.early_stop_agreement)
+        print(f"Early stopping: min {config.min_iterations} iterations, "
+              f"CI half-width {config.early_stop_ci}, mode agreement {config.early_stop_agreement}")
+    normalizer = None
+    if config.normalize:
+        normalizer = TranscriptNormalizer(NormalizationConfig.from_steps(config.normalize))
+        print(f"Transcript normalization: {', '.join(config.normalize)}")
+    if config.batch_size > 1:
+        print(f"Dialogues per request: {config.batch_size}")
+    if config.output_mode == 'scores':
+        print(f"Output: scores only, justifications on the first {config.justified_iterations} iteration(s)")
+        print(f"OverallExperience: computed locally, {describe_weights(OVERALL_WEIGHTS)} "
+              f"(ComplianceSafety and EfficiencyEffort unweighted)")
+    if config.stream:
+        print(f"Streaming: on (responses close once every score has arrived)")
+    if not config.structured_output:
+        print(f"Structured output: off (prompt-only JSON)")
+    print(f"Iteration concurrency: {config.iteration_concurrency}")
+    print(f"Max in-flight requests: {config.concurrency or 'Serial'}")
+    if config.model_concurrency:
+        print(f"Per-model in-flight budgets: {config.model_concurrency}")
+    if config.rpm or config.tpm:
+        print(f"Rate limit budgets: rpm {config.rpm or '-'}, tpm {config.tpm or '-'}")
+    if config.adaptive_concurrency:
+        print(f"Adaptive concurrency: on (budgets act as ceilings)")
     print(f"Output: {config.output_dir}")
     
     # Dataset info
@@ -123,14 +247,43 @@ def run_experiment(config: Config):
     
     # Initialize models
     print(f"\nInitializing models...")
-    models = get_models(config.models)
+    models = get_models(config.models, config.rpm, config.tpm)
+    for model in models:
+        model.config.update(output_mode=config.output_mode, justified_iterations=config.justified_iterations,
+                            stream=config.stream, structured_output=config.structured_output)
+        cap = model.config.get('max_output_tokens')
+        # Justified iterations use the full per-dialogue budget; only pure scores-only runs use the compact one
+        compact = config.output_mode == 'scores' and config.justified_iterations == 0
+        budget = model.output_budget(config.batch_size, compact)
+        if cap and budget > cap:
+            print(f"⚠️  {model.model_name}: --batch-size {config.batch_size} asks for {budget:,} output tokens per "
+                  f"request, above its {cap:,} limit; requests are capped there and dialogues cut off are "
+                  f"re-scored alone (up to {max(1, cap // model.output_budget(1, compact))} fit uncapped)")
+    
+    # Attach the persistent response cache
+    cache = None
+    if config.cache:
+        cache = ResponseCache(config.cache, config.cache_max_size_mb, config.cache_max_age_days)
+        for model in models:
+            model.cache = cache
+        print(f"Response cache: {config.cache}")
     
     # Skip Mistral for Chinese datasets
     if any(m.model_name == "Mistral" for m in models) and "JDDC" in config.datasets:
         print("⚠️  Mistral will skip JDDC (Chinese not supported)")
     
-    # Create output directories with descriptive names
-    timestamp = int(time.time())
+    # Journal completed work so an interrupted run can be resumed
+    if config.resume:
+        journal = RunJournal(config.resume)
+        timestamp = journal.load_config()['timestamp']
+        print(f"Resuming {config.resume}: {journal.completed_dialogues} dialogues already done")
+    else:
+        timestamp = int(time.time())
+        journal = RunJournal(Path(config.output_dir) / f"{timestamp}_run")
+        journal.save_config({**asdict(config), 'timestamp': timestamp})
+        print(f"Run journal: {journal.run_dir} (resume with --resume {journal.run_dir})")
+    
+    # Create output directories with descriptive names (same names on resume, so reports are rebuilt in place)
     output_dirs = {}
     
     for model in models:
@@ -150,17 +303,19 @@ def run_experiment(config: Config):
         Path(output_dirs[model.model_name]).mkdir(parents=True, exist_ok=True)
     
     # Initialize experiment
-    experiment = DatasetExperiment(models, config.iterations)
+    experiment = DatasetExperiment(models, config.iterations, config.iteration_concurrency,
+                                   config.concurrency, config.model_concurrency, config.adaptive_concurrency,
+                                   early_stopping, journal, config.sampling, config.seed, normalizer,
+                                   config.batch_size)
     
     # Calculate total work
-    from dataloader import load_dataset
     total_work = 0
     dataset_sizes = {}
     
     for dataset in config.datasets[:]:  # Copy to allow modification
         try:
-            dialogues = load_dataset(dataset)
-            size = min(config.sample_size, len(dialogues)) if config.sample_size else len(dialogues)
+            count = count_dialogues(dataset)
+            size = min(config.sample_size, count) if config.sample_size else count
             dataset_sizes[dataset] = size
             
             # Count work per model (skip Mistral for JDDC)
@@ -179,24 +334,30 @@ def run_experiment(config: Config):
         print(f"  {dataset}: {size} samples")
     print(f"Total evaluations: {total_work}")
     
-    # Run experiments
+    # Run experiments: one worker per model, datasets in order within each model
     print(f"\nRunning experiments...")
-    pbar = tqdm(total=total_work, desc="Processing", unit="eval")
-    
-    for dataset in config.datasets:
-        print(f"\n📊 Dataset: {dataset}")
-        
-        for model in models:
+    model_datasets = {}
+    for model in models:
+        model_datasets[model] = []
+        for dataset in config.datasets:
             # Skip Mistral for Chinese datasets
             if model.model_name == "Mistral" and dataset == "JDDC":
-                print(f"  ⏭️  Skipping {model.model_name} (Chinese not supported)")
+                print(f"  ⏭️  Skipping {model.model_name} on {dataset} (Chinese not supported)")
                 continue
-            
-            print(f"  🤖 {model.model_name}: ", end="", flush=True)
-            
-            def progress_callback():
-                pbar.update(1)
-                pbar.set_description(f"{model.model_name} on {dataset}")
+            model_datasets[model].append(dataset)
+    
+    progress = ModelProgress(
+        total_work,
+        {model.model_name: sum(dataset_sizes[d] for d in datasets) for model, datasets in model_datasets.items()},
+        {model.model_name: experiment.get_limiter(model.model_name) for model in models}
+    )
+    
+    def run_model(model, datasets):
+        for dataset in datasets:
+            if experiment.stop.is_set():
+                return
+            progress.write(f"  🤖 {model.model_name} on {dataset}: started")
+            done_before = progress.completed(model.model_name)
             
             try:
                 experiment.run_on_dataset_with_progress(
@@ -206,18 +367,34 @@ def run_experiment(config: Config):
                     config.sample_size, 
                     config.verbose, 
                     model, 
-                    progress_callback
+                    lambda: progress.update(model.model_name)
                 )
-                print("✅ Done")
+                progress.write(f"  🤖 {model.model_name} on {dataset}: ✅ Done")
                 
             except Exception as e:
-                print(f"❌ Failed: {e}")
+                if experiment.stop.is_set():
+                    return
+                progress.write(f"  🤖 {model.model_name} on {dataset}: ❌ Failed: {e}")
                 # Skip remaining samples for this model-dataset combination
-                remaining = dataset_sizes[dataset]
-                for _ in range(remaining):
-                    pbar.update(1)
+                finished = progress.completed(model.model_name) - done_before
+                progress.update(model.model_name, dataset_sizes[dataset] - finished)
+    
+    executor = ThreadPoolExecutor(max_workers=len(models))
+    try:
+        futures = [executor.submit(run_model, model, datasets) for model, datasets in model_datasets.items()]
+        for future in futures:
+            future.result()
+    except KeyboardInterrupt:
+        # Workers stop after the dialogue in flight; journaled work is kept for --resume
+        experiment.stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        progress.close()
+        journal.close()
+        raise
+    executor.shutdown()
     
-    pbar.close()
+    progress.close()
+    journal.close()
     
     # Save results
     print(f"\n💾 Saving results...")
@@ -230,7 +407,10 @@ def run_experiment(config: Config):
     summary_df = experiment.get_summary()
     if not summary_df.empty:
         # Show key metrics including MSE
-        key_columns = ['Model', 'Dataset', 'MAE', 'MSE', 'RMSE', 'R²', 'Avg_Pred_1_5', 'Avg_GT_1_5']
+        key_columns = ['Model', 'Dataset', 'MAE', 'MSE', 'RMSE', 'R²', 'Avg_Pred_1_5', 'Avg_GT_1_5',
+                       'Parse_Failure_Rate']
+        if early_stopping:
+            key_columns.append('Avg_Iterations')
         display_df = summary_df[key_columns].round(3)
         
         print(display_df.to_string(index=False))
@@ -248,6 +428,13 @@ def run_experiment(config: Config):
     # Execution summary
     total_time = time.time() - start_time
     print(f"\n⏱️  Completed in {total_time:.1f}s")
+    if cache is not None:
+        print(f"🗄️  Response cache: {cache.summary()}")
+        cache.close()
+    if normalizer is not None and normalizer.tokens:
+        print(f"✂️  Transcript tokens (estimated, per prompt):")
+        for line in normalizer.report():
+            print(f"  {line}")
     
     print(f"\n📁 Results saved to:")
     for model_name, path in output_dirs.items():
@@ -268,8 +455,21 @@ if __name__ == "__main__":
         epilog="""
 Examples:
   python run_v2.py --models chatgpt --datasets CCPE --sample-size 10
+  python run_v2.py --models qwen --datasets MWOZ --sample-size 50 --sampling stratified --seed 7
   python run_v2.py --models all --datasets CCPE MWOZ --iterations 3
+  python run_v2.py --models qwen --datasets MWOZ --iterations 10 --iteration-concurrency 5
+  python run_v2.py --models gemini --datasets MWOZ --sample-size 200 --iterations 10 --concurrency 16
+  python run_v2.py --models all --datasets MWOZ --concurrency 8 --model-concurrency gemini=16 qwen=4
+  python run_v2.py --models all --datasets MWOZ --concurrency 32 --adaptive-concurrency
+  python run_v2.py --models chatgpt --datasets MWOZ --concurrency 8 --rpm chatgpt=500 --tpm chatgpt=30000
+  python run_v2.py --models qwen --datasets MWOZ --iterations 10 --min-iterations 3 --early-stop-ci 5
+  python run_v2.py --models all --datasets MWOZ --cache results/responses.sqlite --cache-max-age-days 30
+  python run_v2.py --models qwen --datasets CCPE --normalize whitespace merge
+  python run_v2.py --models chatgpt --datasets MWOZ --sample-size 100 --batch-size 5
+  python run_v2.py --models gemini --datasets MWOZ --iterations 10 --output-mode scores
+  python run_v2.py --models qwen --datasets CCPE --stream
   python run_v2.py --models gemini qwen --datasets all --plot
+  python run_v2.py --resume results/1718000000_run --concurrency 8
         """
     )
     
@@ -279,19 +479,93 @@ Examples:
                        help='Models to evaluate (default: all)')
     
     parser.add_argument('--datasets', nargs='+', 
-                       choices=['JDDC', 'MWOZ', 'CCPE', 'all'], 
+                       choices=list(REGISTRY) + ['all'], 
                        default=['CCPE'], 
-                       help='Datasets to evaluate (default: CCPE)')
+                       help='Datasets to evaluate; SELECTED is standalone/selected_dialogues.json (default: CCPE)')
     
     parser.add_argument('--sample-size', type=int, default=None, 
                        help='Limit samples per dataset (default: all)')
     
+    parser.add_argument('--sampling', choices=SAMPLING_METHODS, default='reservoir', 
+                       help='How --sample-size dialogues are drawn: uniform reservoir sample, or stratified '
+                            'across ground-truth satisfaction bins (and JDDC action categories) (default: reservoir)')
+    
+    parser.add_argument('--seed', type=int, default=42, 
+                       help='Seed for dialogue sampling (default: 42)')
+    
     parser.add_argument('--iterations', type=int, default=5, 
                        help='Evaluation iterations per dialogue (default: 5)')
     
+    parser.add_argument('--iteration-concurrency', type=int, default=1, 
+                       help='Iterations of one dialogue sent at the same time (default: 1, serial)')
+    
+    parser.add_argument('--concurrency', type=int, default=None, 
+                       help='Global limit on requests in flight; dialogues run in parallel (default: serial)')
+    
+    parser.add_argument('--model-concurrency', nargs='+', default=None, metavar='MODEL=N', 
+                       help='Per-model in-flight budgets, e.g. gemini=16 qwen=4 (overrides --concurrency)')
+    
+    parser.add_argument('--rpm', nargs='+', default=None, metavar='MODEL=N', 
+                       help='Requests-per-minute budgets per API key, e.g. chatgpt=500 (default: no rate limiting)')
+    
+    parser.add_argument('--tpm', nargs='+', default=None, metavar='MODEL=N', 
+                       help='Tokens-per-minute budgets per API key, e.g. chatgpt=30000; each request reserves its '
+                            'prompt plus max_tokens per sample (default: no rate limiting)')
+    
+    parser.add_argument('--adaptive-concurrency', action='store_true', 
+                       help='Tune each model\'s in-flight limit from latency and 429 feedback (AIMD), '
+                            'up to its budget')
+    
+    parser.add_argument('--min-iterations', type=int, default=3, 
+                       help='Iterations always drawn before early stopping may trigger (default: 3)')
+    
+    parser.add_argument('--early-stop-ci', type=float, default=None, metavar='HALF_WIDTH', 
+                       help='Stop once every criterion\'s 95%% CI half-width is within HALF_WIDTH points '
+                            '(0-100 scale); --iterations becomes the maximum')
+    
+    parser.add_argument('--early-stop-agreement', type=float, default=None, metavar='FRACTION', 
+                       help='Stop once at least FRACTION of every criterion\'s scores share the same value')
+    
+    parser.add_argument('--normalize', nargs='+', choices=NORMALIZATION_STEPS + ('all',), default=[], 
+                       help='Normalize transcripts before prompting to cut input tokens: collapse whitespace, '
+                            'merge consecutive same-speaker turns, strip annotation columns (default: off)')
+    
+    parser.add_argument('--batch-size', type=int, default=1, metavar='K', 
+                       help='Score K dialogues per request (JSON array output); dialogues missing from a '
+                            'response are re-scored alone (default: 1)')
+    
+    parser.add_argument('--output-mode', choices=['full', 'scores'], default='full', 
+                       help='scores: integer scores only, with OverallExperience computed locally from the '
+                            'rubric weights, for much shorter outputs (default: full)')
+    
+    parser.add_argument('--justified-iterations', type=int, default=1, metavar='N', 
+                       help='With --output-mode scores, the first N iterations per dialogue still ask for '
+                            'justifications (default: 1)')
+    
+    parser.add_argument('--stream', action='store_true', 
+                       help='Stream responses, close them as soon as every score has arrived, and report '
+                            'time to first token and time to complete score')
+    
+    parser.add_argument('--no-structured-output', dest='structured_output', action='store_false', 
+                       help="Ask for JSON in the prompt only, instead of the provider's JSON mode / response "
+                            "schema (the parse-failure rate is reported either way)")
+    
+    parser.add_argument('--cache', type=str, default=None, metavar='PATH', 
+                       help='SQLite response cache; re-runs with the same model, prompt and settings are not re-billed')
+    
+    parser.add_argument('--cache-max-size-mb', type=float, default=None, 
+                       help='Evict least recently used cache entries above this size')
+    
+    parser.add_argument('--cache-max-age-days', type=float, default=None, 
+                       help='Expire cache entries older than this')
+    
     parser.add_argument('--output-dir', type=str, default='results', 
                        help='Output directory (default: results)')
     
+    parser.add_argument('--resume', type=str, default=None, metavar='RUN_DIR', 
+                       help='Resume an interrupted run from its journal directory (OUTPUT_DIR/<timestamp>_run); '
+                            'models, datasets, sample size and iteration settings are taken from the run')
+    
     parser.add_argument('--plot', action='store_true', 
                        help='Generate plots (requires matplotlib)')
     
@@ -304,12 +578,29 @@ Examples:
     if 'all' in args.datasets:
         args.datasets = ['JDDC', 'MWOZ', 'CCPE']
     
+    try:
+        args.model_concurrency = parse_model_budgets(args.model_concurrency)
+        args.rpm = parse_model_budgets(args.rpm, '--rpm')
+        args.tpm = parse_model_budgets(args.tpm, '--tpm')
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.resume:
+        config_path = Path(args.resume) / RunJournal.CONFIG_FILENAME
+        if not config_path.exists():
+            parser.error(f"No run config found at {config_path}")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        for name in RESUMED_FIELDS:
+            setattr(args, name, saved.get(name, getattr(args, name)))
+    
     config = Config(**vars(args))
     
     try:
         run_experiment(config)
     except KeyboardInterrupt:
         print(f"\n\n⏹️  Experiment interrupted by user")
+        print(f"   Completed dialogues are journaled; continue with --resume OUTPUT_DIR/<timestamp>_run")
     except Exception as e:
         print(f"\n\n❌ Experiment failed: {e}")
         raise
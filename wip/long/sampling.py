@@ -0,0 +1,93 @@
+"""
+One-pass dialogue sampling (reservoir and stratified) with a local seeded RNG
+"""
+
+import random
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from dataloader import Dialogue, Language
+
+SAMPLING_METHODS = ('reservoir', 'stratified')
+
+
+def reservoir_sample(dialogues: Iterable[Dialogue], k: int, seed: int = 42) -> List[Dialogue]:
+    """Uniform sample of k dialogues in one pass, returned in stream order"""
+    rng = random.Random(seed)
+    reservoir: List[Tuple[int, Dialogue]] = []
+    for idx, dialogue in enumerate(dialogues):
+        if len(reservoir) < k:
+            reservoir.append((idx, dialogue))
+        else:
+            slot = rng.randint(0, idx)
+            if slot < k:
+                reservoir[slot] = (idx, dialogue)
+    return [dialogue for _, dialogue in sorted(reservoir, key=lambda item: item[0])]
+
+
+def satisfaction_stratum(dialogue: Dialogue) -> Hashable:
+    """Ground-truth satisfaction bin (rounded 1-5), plus the dominant action category for JDDC"""
+    satisfaction_bin = min(5, max(1, int(dialogue.average_satisfaction + 0.5)))
+    if dialogue.language != Language.CHINESE:
+        return satisfaction_bin
+    # JDDC actions are already mapped to ActionMapper categories by the parser
+    actions = Counter(utt.action for utt in dialogue.utterances if utt.action)
+    category = actions.most_common(1)[0][0] if actions else 'OTHER'
+    return satisfaction_bin, category
+
+
+def _balanced_allocation(sizes: Dict[Hashable, int], k: int) -> Dict[Hashable, int]:
+    """Split k as evenly as possible across strata, giving small strata's leftover to larger ones"""
+    allocation = dict.fromkeys(sizes, 0)
+    remaining = min(k, sum(sizes.values()))
+    while remaining:
+        open_strata = [stratum for stratum in sorted(sizes, key=repr) if allocation[stratum] < sizes[stratum]]
+        share = max(1, remaining // len(open_strata))
+        for stratum in open_strata:
+            take = min(share, sizes[stratum] - allocation[stratum], remaining)
+            allocation[stratum] += take
+            remaining -= take
+            if not remaining:
+                break
+    return allocation
+
+
+def stratified_sample(dialogues: Iterable[Dialogue], k: int, seed: int = 42,
+                      stratum: Callable[[Dialogue], Hashable] = satisfaction_stratum) -> List[Dialogue]:
+    """Sample of k dialogues balanced across strata, in one pass, returned in stream order.
+
+    Each stratum keeps a reservoir of at most k dialogues, so memory stays
+    bounded by k times the number of strata.
+    """
+    rng = random.Random(seed)
+    reservoirs: Dict[Hashable, List[Tuple[int, Dialogue]]] = {}
+    seen: Dict[Hashable, int] = {}
+    for idx, dialogue in enumerate(dialogues):
+        key = stratum(dialogue)
+        reservoir = reservoirs.setdefault(key, [])
+        seen[key] = seen.get(key, 0) + 1
+        if len(reservoir) < k:
+            reservoir.append((idx, dialogue))
+        else:
+            slot = rng.randint(0, seen[key] - 1)
+            if slot < k:
+                reservoir[slot] = (idx, dialogue)
+
+    allocation = _balanced_allocation({key: len(reservoir) for key, reservoir in reservoirs.items()}, k)
+    # Iterate strata in a fixed order so the sample only depends on the seed
+    sample = []
+    for key in sorted(reservoirs, key=repr):
+        sample.extend(rng.sample(reservoirs[key], allocation[key]))
+    return [dialogue for _, dialogue in sorted(sample, key=lambda item: item[0])]
+
+
+def sample_dialogues(dialogues: Iterable[Dialogue], k: Optional[int], method: str = 'reservoir',
+                     seed: int = 42) -> Iterable[Dialogue]:
+    """Sample k dialogues with the named method; all of them when k is None"""
+    if not k:
+        return dialogues
+    if method == 'reservoir':
+        return reservoir_sample(dialogues, k, seed)
+    if method == 'stratified':
+        return stratified_sample(dialogues, k, seed)
+    raise ValueError(f"Unknown sampling method: {method} (choose from {', '.join(SAMPLING_METHODS)})")
@@ -1,38 +1,31 @@
+import os
+import sys
 import pandas as pd
 import json
-import copy
 import numpy as np
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from registry import iter_json_records
       
 
 def split_data_label(data):
     print(f"Split_data_label for {len(data)} records.")
-    preprocess_dialogue_data = copy.deepcopy(data)
 
     # score each dialogue
     average_scores = []
     average_score_100 = []
     overall_scores = []
-    for dialogue in preprocess_dialogue_data:
+    for dialogue in data:
         average_scores.append({"dialogue_id": dialogue['dialogue_id'], "average_scores": dialogue['average_score']})
         average_score_100.append({"dialogue_id": dialogue['dialogue_id'], "average_score_100": dialogue['average_score_100']})
         overall_scores.append({"dialogue_id": dialogue['dialogue_id'], "overall_scores": dialogue['overall_scores']})
 
-    # Preprocess into data and label (scores)
-    
-    for dialogue in preprocess_dialogue_data:
-        for turn in dialogue['turns']:
-            # remove the "scores" field
-            if 'scores' in turn:
-                del turn['scores']
-            if 'intent' in turn:
-                del turn['intent']
-            
+    # Preprocess into data and label (scores): the text only uses speaker and text,
+    # so the "scores" and "intent" fields are left out instead of deleted from a copy
     data_inference = []
-    for dialogue in preprocess_dialogue_data:
-        dialogue_text = ""
-        for turn in dialogue['turns']:
-            dialogue_text += turn['speaker'] + ": " + turn['text'] + "\n"
+    for dialogue in data:
+        dialogue_text = "".join(turn['speaker'] + ": " + turn['text'] + "\n" for turn in dialogue['turns'])
         data_inference.append({"dialogue_id": dialogue['dialogue_id'], "text": dialogue_text})
         
     return data_inference, average_scores, average_score_100, overall_scores
@@ -60,14 +53,11 @@ def calculate_all_metrics(y_true, y_pred):
     return metrics
 
 def main():
-    with open("selected_dialogues.json", "r") as f:
-        data = json.load(f)
-
     # data_sample is the data in barem so remove it in data
     data_sample = []
     data_inference = []
 
-    for dialogue in data['dialogues']:
+    for dialogue in iter_json_records("selected_dialogues.json"):
         if (dialogue['dialogue_id'] in {335, 25, 26}):
             data_sample.append(dialogue)
         else:
@@ -6,20 +6,44 @@ Requires environment variable: QWEN_API_KEY
 
 import json
 import os
-import re
+import sys
 from collections import Counter
 import openai  # uses OpenAI-compatible Qwen API endpoint
 from typing import List, Any, Dict
 from tqdm import tqdm
 from prompts import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.cache import ResponseCache, cached_chat_completion
+from registry import iter_json_records
+from normalize import NormalizationConfig, TranscriptNormalizer, collapse_whitespace, normalize_tsv
+
 MODEL = "qwen3-30b-a3b-instruct-2507"
 BASE_URL = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
 TEMPERATURE = 0.7
 NUM_ITER = 1
+# Adaptive sampling: stop before NUM_ITER once every criterion's mode covers
+# MODE_AGREEMENT of the scores (never before MIN_ITER valid responses)
+MIN_ITER = 3
+MODE_AGREEMENT = 0.8
 # K = 5
 MAX_TOKEN = 2048
 SAMPLES_IDS = {335, 25, 26}
+# Persistent response cache (None disables), relative to this script's directory;
+# re-runs replay cached attempts instead of re-billing, e.g. "response_cache.sqlite"
+CACHE_PATH = None
+# Transcript normalization to cut input tokens (None sends transcripts and few-shot blocks as-is),
+# e.g. NormalizationConfig(strip_annotations=True)
+NORMALIZE = None
+# Scores-only output: integer scores within SCORES_MAX_TOKEN, OverallExperience computed locally
+# from OVERALL_WEIGHTS; the first JUSTIFIED_ITER responses per dialogue keep their justifications
+SCORES_ONLY = False
+JUSTIFIED_ITER = 1
+SCORES_MAX_TOKEN = 64
+# Qwen JSON mode: responses are always a JSON object, so attempts are not spent on invalid JSON
+# (the prompt's output format still defines the keys)
+JSON_MODE = True
+RESPONSE_FORMAT = {"response_format": {"type": "json_object"}} if JSON_MODE else {}
 
 # Reasoning problem
 PROMPT_TEMPLATE = """
@@ -235,47 +259,99 @@ Expected:
 }
 """
 
+def open_cache():
+    """The response cache at CACHE_PATH, or None when caching is off"""
+    if not CACHE_PATH:
+        return None
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_PATH)
+    print(f"Response cache: {path} (cached samples are replayed, not re-requested)")
+    return ResponseCache(path)
+
 def extract_json_response(text):
     """
     Extract and parse the first valid JSON object from the model response.
     Handles extra text before/after JSON.
     """
-    # Try to find a JSON object (naive but effective)
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
+    start = text.find("{")
+    if start < 0:
         return None
     try:
-        return json.loads(match.group(0))
+        return json.JSONDecoder().raw_decode(text, start)[0]
     except json.JSONDecodeError:
         return None
 
+def with_local_overall(parsed):
+    """
+    Bring a scores-only response to the full schema: bare scores become
+    {"score": ...} entries and OverallExperience is the weighted average of
+    the criteria, rounded down to a rubric level (20-100) as the prompts specify.
+    None when a weighted criterion has no numeric score.
+    """
+    if not isinstance(parsed, dict):
+        return None
+    expanded = {crit: value if isinstance(value, dict) else {"score": value, "justification": ""}
+                for crit, value in parsed.items()}
+    scores = [expanded.get(crit, {}).get("score") for crit in OVERALL_WEIGHTS]
+    if not all(isinstance(score, (int, float)) for score in scores):
+        return None
+    overall = sum(w * s for w, s in zip(OVERALL_WEIGHTS.values(), scores)) / sum(OVERALL_WEIGHTS.values())
+    # Rounded first so float error cannot drop an exact level (e.g. 79.99999 for 80) a step
+    expanded["OverallExperience"] = {"score": max(20, int(round(overall, 6) // 20) * 20),
+                                     "justification": "Weighted average of the criteria scores, computed locally."}
+    return expanded
+
+CRITERIA = [
+    "TaskSuccess",
+    "Helpfulness",
+    "Accuracy",
+    "Understanding",
+    "Empathy",
+    "Fluency",
+    "OverallExperience"
+]
+
+def collect_scores(responses, crit):
+    """
+    Collect (score, justification) pairs for one criterion from valid responses.
+    """
+    scores = []
+    justifications = []
+    
+    for resp in responses:
+        if isinstance(resp, dict) and crit in resp:
+            entry = resp[crit]
+            if isinstance(entry, dict) and "score" in entry:
+                scores.append(entry["score"])
+                justifications.append(entry.get("justification", "No justification."))
+    
+    return scores, justifications
+
+def has_converged(responses, min_responses=MIN_ITER, agreement=MODE_AGREEMENT):
+    """
+    Mode-agreement stopping rule: True once every criterion's most common
+    score covers at least `agreement` of its scores.
+    """
+    if len(responses) < min_responses:
+        return False
+    
+    for crit in CRITERIA:
+        scores, _ = collect_scores(responses, crit)
+        if not scores:
+            return False
+        if max(Counter(scores).values()) / len(scores) < agreement:
+            return False
+    
+    return True
+
 def aggregate_scores(responses):
     """
     Aggregate scores per criterion using mode.
     Tie-breaker: choose higher score.
     """
-    criteria = [
-        "TaskSuccess",
-        "Helpfulness",
-        "Accuracy",
-        "Understanding",
-        "Empathy",
-        "Fluency",
-        "OverallExperience"
-    ]
-    
     result = {}
     
-    for crit in criteria:
-        scores = []
-        justifications = []
-        
-        for resp in responses:
-            if isinstance(resp, dict) and crit in resp:
-                entry = resp[crit]
-                if isinstance(entry, dict) and "score" in entry:
-                    scores.append(entry["score"])
-                    justifications.append(entry.get("justification", "No justification."))
+    for crit in CRITERIA:
+        scores, justifications = collect_scores(responses, crit)
         
         if not scores:
             result[crit] = {"score": 40, "justification": "No valid scores."}
@@ -291,9 +367,9 @@ def aggregate_scores(responses):
         else:
             chosen = max(candidates)  # tie → higher score
         
-        # Pick a matching justification
+        # Pick a matching justification (scores-only responses have none)
         for s, j in zip(scores, justifications):
-            if s == chosen:
+            if s == chosen and j:
                 justification = j
                 break
         else:
@@ -343,21 +419,25 @@ USER	Goodbye.	OTHER	2,3,3,3
         raise ValueError("Please set QWEN_API_KEY environment variable.")
     
     client = openai.OpenAI(api_key=api_key, base_url=BASE_URL.strip())
+    cache = open_cache()
     valid_responses = []
 
     print(f"Running {NUM_ITER} iteration (temp={TEMPERATURE})...\n")
 
     i = 0
+    attempt = 0  # Cache key per attempt, so a replayed invalid response is not retried forever
     while i < NUM_ITER:
         try:
-            resp = client.chat.completions.create(
+            attempt += 1
+            raw = cached_chat_completion(
+                cache, client, iteration=attempt - 1,
                 model=MODEL,
                 messages=[{"role": "user", "content": full_prompt}],
                 temperature=TEMPERATURE,
                 max_tokens=MAX_TOKEN,
                 n=1, # dashscope only support n=[1,4]
-            )
-            raw = resp.choices[0].message.content.strip()
+                **RESPONSE_FORMAT,
+            ).strip()
             parsed = extract_json_response(raw)
             
             if parsed:
@@ -382,11 +462,11 @@ USER	Goodbye.	OTHER	2,3,3,3
     print("FINAL AGGREGATED EVALUATION")
     print("="*50)
     print(json.dumps(final_result, indent=2))
+    if cache is not None:
+        print(f"Response cache: {cache.summary()}")
 
 def load_dialogue_dataset(file_path: str) -> List[Dict[str, Any]]:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data['dialogues']
+    return list(iter_json_records(file_path))
 
 def dialogue_to_prompt_format(dialogue: dict, include_overall: bool = False) -> str:
     lines = []
@@ -425,6 +505,18 @@ def full_poc():
     if not api_key:
         raise ValueError("Please set QWEN_API_KEY environment variable.")
     client = openai.OpenAI(api_key=api_key, base_url=BASE_URL.strip())
+    cache = open_cache()
+    normalizer = TranscriptNormalizer(NORMALIZE) if NORMALIZE else None
+    prompt = PROMPT_1
+    if normalizer is not None and NORMALIZE.collapse_whitespace:
+        prompt = collapse_whitespace(PROMPT_1)
+        normalizer.record("prompt", PROMPT_1, prompt)
+    # The rubric and few-shot examples are a fixed system message, so the provider
+    # serves them from its prompt cache and only the dialogue is new input
+    system_prompt, dialogue_template = split_prompt(prompt)
+    scores_prompt = system_prompt + SCORES_ONLY_OUTPUT
+    usage = {}
+    parsed_count = parse_failures = 0
 
     for dial in tqdm(dialogues, desc="Processing dialogues"):
         dialogue_id = dial["dialogue_id"]
@@ -434,7 +526,11 @@ def full_poc():
             continue
 
         processed_dial = dialogue_to_prompt_format(dial, include_overall=False)
-        full_prompt = PROMPT_1.replace("{{dialogue_transcript}}", processed_dial.strip())
+        if normalizer is not None:
+            normalized = normalize_tsv(processed_dial, NORMALIZE)
+            normalizer.record("selected_dialogues", processed_dial, normalized)
+            processed_dial = normalized
+        user_prompt = dialogue_template.replace(DIALOGUE_PLACEHOLDER, processed_dial.strip())
 
         valid_responses = []
         attempts = 0
@@ -443,27 +539,40 @@ def full_poc():
         print(f"\nEvaluating dialogue {dialogue_id}...")
 
         while len(valid_responses) < NUM_ITER and attempts < max_attempts:
+            scores_only = SCORES_ONLY and len(valid_responses) >= JUSTIFIED_ITER
             try:
-                resp = client.chat.completions.create(
+                raw = cached_chat_completion(
+                    cache, client, iteration=attempts, usage=usage,
                     model=MODEL,
-                    messages=[{"role": "user", "content": full_prompt}],
+                    messages=[
+                        {"role": "system", "content": scores_prompt if scores_only else system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
                     temperature=TEMPERATURE,
-                    max_tokens=MAX_TOKEN,
+                    max_tokens=SCORES_MAX_TOKEN if scores_only else MAX_TOKEN,
                     n=1,
-                )
-                raw = resp.choices[0].message.content.strip()
+                    **RESPONSE_FORMAT,
+                ).strip()
                 parsed = extract_json_response(raw)
+                if SCORES_ONLY:
+                    parsed = with_local_overall(parsed)
+                parsed_count += 1
                 
                 if parsed:
                     valid_responses.append(parsed)
                     print(f"  ✅ Got valid response ({len(valid_responses)}/{NUM_ITER})")
                 else:
+                    parse_failures += 1
                     print(f"  ❌ Invalid JSON (attempt {attempts + 1})")
                     
             except Exception as e:
                 print(f"  ❌ API Error (attempt {attempts + 1}): {e}")
             
             attempts += 1
+            
+            if has_converged(valid_responses):
+                print(f"  ⏹️  Scores converged after {len(valid_responses)} responses")
+                break
 
         # Initialize default result
         final_result = None
@@ -485,7 +594,9 @@ def full_poc():
             "dialogue_id": dialogue_id,
             "ground_truth_100": dial.get("average_score_100", 0.0),
             "ground_truth_5": dial.get("average_score", 0.0),
-            "model_evaluation": final_result  # This is the full dict with all categories
+            "model_evaluation": final_result,  # This is the full dict with all categories
+            "iterations_used": len(valid_responses),
+            "api_calls": attempts
         }
 
         # Optional: save intermediate results
@@ -505,6 +616,17 @@ def full_poc():
     print(f"   Summary saved to: result.json")
     print(f"   Full details saved to: result_details.json")
     print(f"   Total dialogues evaluated: {len(summary_results)}")
+    if cache is not None:
+        print(f"   Response cache: {cache.summary()}")
+    if normalizer is not None:
+        for line in normalizer.report():
+            print(f"   Tokens {line}")
+    if usage.get('prompt_tokens'):
+        print(f"   Prompt tokens: {usage['prompt_tokens']:,} "
+              f"({usage['cached_tokens'] / usage['prompt_tokens']:.1%} from provider prompt cache)")
+    if parsed_count:
+        print(f"   Parse failures: {parse_failures}/{parsed_count} responses ({parse_failures / parsed_count:.1%}, "
+              f"JSON mode {'on' if JSON_MODE else 'off'})")
 
 if __name__ == "__main__":
     # single_poc()
@@ -7,12 +7,18 @@ Requires environment variable: QWEN_API_KEY
 import json
 import os
 import re
+import sys
 from collections import Counter
 import openai  # uses OpenAI-compatible Qwen API endpoint
 from typing import List, Any, Dict
 from tqdm import tqdm
 from prompts import *
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.cache import ResponseCache, cached_chat_completion
+from registry import iter_json_records
+from normalize import NormalizationConfig, TranscriptNormalizer, collapse_whitespace, normalize_tsv
+
 MODEL = "qwen3-30b-a3b-instruct-2507"
 BASE_URL = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
 TEMPERATURE = 0.7
@@ -20,6 +26,20 @@ NUM_ITER = 1
 # K = 5
 MAX_TOKEN = 2048
 SAMPLES_IDS = {335, 25, 26}
+# Persistent response cache (None disables), relative to this script's directory;
+# re-runs replay cached attempts instead of re-billing, e.g. "response_cache.sqlite"
+CACHE_PATH = None
+# Transcript normalization to cut input tokens (None sends transcripts and few-shot blocks as-is),
+# e.g. NormalizationConfig(strip_annotations=True)
+NORMALIZE = None
+
+def open_cache():
+    """The response cache at CACHE_PATH, or None when caching is off"""
+    if not CACHE_PATH:
+        return None
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_PATH)
+    print(f"Response cache: {path} (cached samples are replayed, not re-requested)")
+    return ResponseCache(path)
 
 def extract_json_response(text):
     """
@@ -90,9 +110,7 @@ def aggregate_scores(responses):
     return result
 
 def load_dialogue_dataset(file_path: str) -> List[Dict[str, Any]]:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data['dialogues']
+    return list(iter_json_records(file_path))
 
 def dialogue_to_prompt_format(dialogue: dict, include_overall: bool = False) -> str:
     lines = []
@@ -131,6 +149,13 @@ def full_poc():
     if not api_key:
         raise ValueError("Please set QWEN_API_KEY environment variable.")
     client = openai.OpenAI(api_key=api_key, base_url=BASE_URL.strip())
+    cache = open_cache()
+    normalizer = TranscriptNormalizer(NORMALIZE) if NORMALIZE else None
+    prompt = PROMPT_MULTI_AGENT_DEBATE
+    if normalizer is not None and NORMALIZE.collapse_whitespace:
+        prompt = collapse_whitespace(PROMPT_MULTI_AGENT_DEBATE)
+        normalizer.record("prompt", PROMPT_MULTI_AGENT_DEBATE, prompt)
+    usage = {}
 
     for dial in tqdm(dialogues, desc="Processing dialogues"):
         dialogue_id = dial["dialogue_id"]
@@ -140,6 +165,10 @@ def full_poc():
             continue
 
         processed_dial = dialogue_to_prompt_format(dial, include_overall=False)
+        if normalizer is not None:
+            normalized = normalize_tsv(processed_dial, NORMALIZE)
+            normalizer.record("selected_dialogues", processed_dial, normalized)
+            processed_dial = normalized
 
         valid_responses = []
         attempts = 0
@@ -149,17 +178,17 @@ def full_poc():
 
         while len(valid_responses) < NUM_ITER and attempts < max_attempts:
             try:
-                resp = client.chat.completions.create(
+                raw = cached_chat_completion(
+                    cache, client, iteration=attempts, usage=usage,
                     model=MODEL,
                     messages=[
-                        {"role": "system", "content": PROMPT_MULTI_AGENT_DEBATE},
+                        {"role": "system", "content": prompt},
                         {"role": "user", "content": processed_dial}
                     ],
                     temperature=TEMPERATURE,
                     max_tokens=MAX_TOKEN,
                     n=1,
-                )
-                raw = resp.choices[0].message.content.strip()
+                ).strip()
                 parsed = extract_json_response(raw)
                 
                 if parsed:
@@ -213,6 +242,14 @@ def full_poc():
     print(f"   Summary saved to: result.json")
     print(f"   Full details saved to: result_details.json")
     print(f"   Total dialogues evaluated: {len(summary_results)}")
+    if cache is not None:
+        print(f"   Response cache: {cache.summary()}")
+    if normalizer is not None:
+        for line in normalizer.report():
+            print(f"   Tokens {line}")
+    if usage.get('prompt_tokens'):
+        print(f"   Prompt tokens: {usage['prompt_tokens']:,} "
+              f"({usage['cached_tokens'] / usage['prompt_tokens']:.1%} from provider prompt cache)")
 
 if __name__ == "__main__":
     # single_poc()
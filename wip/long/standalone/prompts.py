@@ -1,3 +1,37 @@
+DIALOGUE_PLACEHOLDER = "{{dialogue_transcript}}"
+
+
+def split_prompt(prompt: str):
+    """Split a template into its static prefix (rubric and few-shot examples) and the dialogue suffix.
+
+    The templates end with the dialogue section, so the prefix is identical
+    across dialogues and can be sent as a system message that providers
+    serve from their prompt cache.
+    """
+    head, tail = prompt.split(DIALOGUE_PLACEHOLDER)
+    prefix, _, heading = head.rstrip('\n').rpartition('\n')
+    return prefix.strip(), f"{heading}\n{DIALOGUE_PLACEHOLDER}{tail}".strip()
+
+
+# Rubric weights of the six criteria, as PROMPT_3 and PROMPT_4 state them
+OVERALL_WEIGHTS = {
+    "TaskSuccess": 0.40,
+    "Helpfulness": 0.15,
+    "Accuracy": 0.15,
+    "Understanding": 0.10,
+    "Empathy": 0.10,
+    "Fluency": 0.10
+}
+
+# Appended to a template's static prefix for scores-only responses; OverallExperience is computed locally
+SCORES_ONLY_OUTPUT = """
+=== SCORES-ONLY OUTPUT ===
+This replaces the output format above. Return only the integer score of each criterion, with no
+justifications and no OverallExperience, as one line of JSON:
+{"TaskSuccess": <int>, "Helpfulness": <int>, "Accuracy": <int>, "Understanding": <int>, "Empathy": <int>, "Fluency": <int>}
+"""
+
+
 PROMPT_1 = """
 You are an evaluator for customer service dialogues. 
 Use the provided few-shot examples as guidance. 
@@ -105,9 +139,6 @@ Expected output:
  "OverallExperience": {"score": 40, "justification": "Overall the exchange is shallow and yields limited useful information."}
 }
  
-=== TARGET DIALOGUE ===
-{{dialogue_transcript}}
- 
 
 Output JSON (strict):
 {
@@ -119,6 +150,9 @@ Output JSON (strict):
  "Fluency": {"score": <...>, "justification": "..."},
  "OverallExperience": {"score": <...>, "justification": "..."}
 }
+
+=== TARGET DIALOGUE ===
+{{dialogue_transcript}}
 """
 
 PROMPT_2 = """
@@ -202,9 +236,6 @@ Expected output:
 	"Score": 40
   }
 }
-=== TARGET DIALOGUE ===
-{{dialogue_transcript}}
- 
 Output strictly in JSON:
 {
  "TaskSuccess": {"score": <20|40|60|80|100>, "justification": "<1-sentence evidence>"},
@@ -215,6 +246,9 @@ Output strictly in JSON:
  "Fluency": {"score": <...>, "justification": "..."},
  "OverallExperience": {"score": <...>, "justification": "..."}
 }
+
+=== TARGET DIALOGUE ===
+{{dialogue_transcript}}
 """
 
 PROMPT_3 = """
@@ -398,9 +432,6 @@ Expected:
 "OverallExperience": {"score": 20, "justification": "Weighted average with low bias -> 20."}
 }
 
-=== TARGET DIALOGUE ===
-{{dialogue_transcript}}
-
 === OUTPUT FORMAT ===
 
 Output a strict JSON object that exactly follows the structure below.
@@ -448,6 +479,9 @@ Return your answer only in this JSON format — no extra text, no commentary.
 "justification": "Weighted average of all criteria, rounded down to the nearest level according to the scale."
 }
 }
+
+=== TARGET DIALOGUE ===
+{{dialogue_transcript}}
 """
 
 PROMPT_4 = """
@@ -648,9 +682,6 @@ Expected:
   }
 }
 
-=== Dialogue ===
-{{dialogue_transcript}}
-
 === Output JSON (ONLY) ===
 {
   "TaskSuccess": {"score": 40, "justification": "Interaction is repetitive and yields limited actionable content."},
@@ -661,6 +692,9 @@ Expected:
   "Fluency": {"score": 60, "justification": "Understandable but only moderately fluent."},
   "OverallExperience": {"score": 40, "justification": "Weighted average rounds to 40 per specified mapping."}
 }
+
+=== Dialogue ===
+{{dialogue_transcript}}
 """
 
 PROMPT_MULTI_AGENT_DEBATE = """
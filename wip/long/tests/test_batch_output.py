@@ -0,0 +1,59 @@
+"""
+Tests for splitting a multi-dialogue response into per-dialogue outputs
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.base import CRITERIA, SCORED_CRITERIA, BaseCSATModel, Prompt
+
+
+class StubModel(BaseCSATModel):
+    def _initialize_model(self):
+        self.model_version = 'stub'
+
+    def _generate_response(self, prompt: Prompt) -> str:
+        raise AssertionError("no provider calls in batch output tests")
+
+
+def entry(dialogue_id, score=80, criteria=CRITERIA):
+    return {"dialogue_id": dialogue_id, **{key: {"score": score, "justification": "ok"} for key in criteria}}
+
+
+def test_entries_are_keyed_by_dialogue_id():
+    model = StubModel('Stub')
+    response = "Here you go:\n```json\n" + json.dumps([entry(2, 60), entry(1, 80)]) + "\n```"
+    outputs = model._split_batch_output(response, 2)
+    assert sorted(outputs) == [1, 2]
+    assert json.loads(outputs[2])['TaskSuccess']['score'] == 60
+    assert 'dialogue_id' not in json.loads(outputs[1])
+
+
+def test_missing_duplicated_and_out_of_range_ids_are_left_out():
+    model = StubModel('Stub')
+    response = json.dumps([entry(1), entry(3), entry(3), entry(7), {"dialogue_id": "x"}])
+    assert list(model._split_batch_output(response, 4)) == [1]
+
+
+def test_entries_without_every_score_are_left_out():
+    model = StubModel('Stub')
+    incomplete = entry(2)
+    del incomplete['FluencyCoherence']
+    broken = entry(3)
+    broken['TaskSuccess'] = {"score": "high"}
+    assert list(model._split_batch_output(json.dumps([entry(1), incomplete, broken]), 3)) == [1]
+
+
+def test_truncated_response_keeps_complete_entries():
+    model = StubModel('Stub')
+    text = json.dumps([entry(1), entry(2)])
+    assert list(model._split_batch_output(text[:-40], 2)) == [1]
+
+
+def test_scores_only_entries_need_no_overall():
+    model = StubModel('Stub', {'output_mode': 'scores'})
+    entries = [{"dialogue_id": i, **{key: 70 for key in SCORED_CRITERIA}} for i in (1, 2)]
+    assert sorted(model._split_batch_output(json.dumps(entries), 2)) == [1, 2]
+    assert list(StubModel('Stub')._split_batch_output(json.dumps(entries), 2)) == []
@@ -0,0 +1,65 @@
+"""
+Tests for response cache keys and storage
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.base import BaseCSATModel, Prompt
+from models.cache import ResponseCache
+
+
+class StubModel(BaseCSATModel):
+    SUPPORTS_STRUCTURED_OUTPUT = True
+
+    def _initialize_model(self):
+        self.model_version = self.config['model_version']
+
+    def _generate_response(self, prompt: Prompt) -> str:
+        raise AssertionError("no provider calls in cache tests")
+
+
+PROMPT = Prompt(system="Rubric", user="USER: hi\nSYSTEM: hello")
+KEY_ARGS = ('ChatGPT', 'gpt-4o', 0.3, 2000, ['Rubric', 'user'], 0)
+
+
+def test_key_is_stable_and_order_independent():
+    assert ResponseCache.make_key(*KEY_ARGS, a=1, b=2) == ResponseCache.make_key(*KEY_ARGS, b=2, a=1)
+
+
+def test_every_component_changes_the_key():
+    base = ResponseCache.make_key(*KEY_ARGS)
+    for i, changed in enumerate(['Gemini', 'gpt-4o-mini', 0.7, 4000, ['Rubric', 'other'], 1]):
+        args = list(KEY_ARGS)
+        args[i] = changed
+        assert ResponseCache.make_key(*args) != base
+    assert ResponseCache.make_key(*KEY_ARGS, stream=True) != base
+
+
+def test_model_key_covers_output_settings():
+    def key(**config):
+        model = StubModel('ChatGPT', {'model_version': 'gpt-4o', **config})
+        return model._cache_key(PROMPT, 0)
+
+    base = key()
+    assert key() == base
+    assert key(model_version='gpt-4o-mini') != base
+    assert key(max_tokens=500) != base
+    assert key(max_output_tokens=1000) != base  # Caps the effective output budget
+    assert key(structured_output=False) != base  # Response schema is part of the key
+    assert key(stream=True) != base
+
+
+def test_model_key_separates_iterations():
+    model = StubModel('ChatGPT', {'model_version': 'gpt-4o'})
+    assert model._cache_key(PROMPT, 0) != model._cache_key(PROMPT, 1)
+
+
+def test_put_get_and_stats(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    key = ResponseCache.make_key(*KEY_ARGS)
+    assert cache.get(key) is None
+    cache.put(key, '{"TaskSuccess": 80}')
+    assert cache.get(key) == '{"TaskSuccess": 80}'
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,58 @@
+"""
+Tests for resuming from the run journal
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from checkpoint import RunJournal
+from models.base import ModelResponse
+
+KEY = ('Qwen', 'MWOZ', 3, 'abcd1234')
+
+
+def test_iterations_and_dialogues_survive_a_restart(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    checkpoint = journal.checkpoint(*KEY)
+    checkpoint.record(0, ModelResponse(text='first', retries=2))
+    checkpoint.record(1, ModelResponse(text='second'))
+    journal.record_dialogue('Qwen', 'MWOZ', 4, 'ffff0000', {'mae': 0.5})
+    journal.close()
+
+    resumed = RunJournal(str(tmp_path))
+    responses = resumed.checkpoint(*KEY).responses
+    assert {i: (r.text, r.retries) for i, r in responses.items()} == {0: ('first', 2), 1: ('second', 0)}
+    assert resumed.completed_dialogues == 1
+    assert resumed.dialogue_result('Qwen', 'MWOZ', 4, 'ffff0000') == {'mae': 0.5}
+
+
+def test_changed_dialogue_text_does_not_match(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    journal.checkpoint(*KEY).record(0, ModelResponse(text='first'))
+    journal.close()
+
+    resumed = RunJournal(str(tmp_path))
+    assert resumed.checkpoint('Qwen', 'MWOZ', 3, 'changed0').responses == {}
+
+
+def test_truncated_last_line_is_skipped_and_not_glued_to(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    journal.checkpoint(*KEY).record(0, ModelResponse(text='first'))
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "iteration", "model": "Qw')  # Crash mid-write
+
+    resumed = RunJournal(str(tmp_path))
+    assert list(resumed.checkpoint(*KEY).responses) == [0]
+    resumed.checkpoint(*KEY).record(1, ModelResponse(text='second'))
+    resumed.close()
+
+    assert sorted(RunJournal(str(tmp_path)).checkpoint(*KEY).responses) == [0, 1]
+
+
+def test_config_round_trip(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    journal.save_config({'models': ['qwen'], 'sample_size': 5})
+    assert journal.load_config() == {'models': ['qwen'], 'sample_size': 5}
+    journal.close()
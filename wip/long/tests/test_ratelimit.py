@@ -0,0 +1,64 @@
+"""
+Tests for the token-bucket rate limiter
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.ratelimit import RateLimiter, TokenBucket, estimate_tokens, get_rate_limiter
+
+
+def test_bucket_starts_full_and_refills_continuously():
+    bucket = TokenBucket(60)  # One unit per second
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0.0
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+
+
+def test_refill_is_capped_at_capacity():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    bucket.consume(10)
+    bucket.wait_time(0, now + 3600)
+    assert bucket.available == 60
+
+
+def test_oversized_requests_wait_for_a_full_bucket():
+    bucket = TokenBucket(60)
+    now = bucket.updated
+    assert bucket.wait_time(1000, now) == 0.0
+    bucket.consume(1000)
+    assert bucket.available == 0
+    assert bucket.wait_time(1000, now) == pytest.approx(60.0)
+
+
+def test_budget_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_acquire_spends_both_budgets():
+    limiter = RateLimiter(rpm=100, tpm=1000)
+    limiter.acquire(250)
+    assert limiter.requests.available == pytest.approx(99, abs=0.1)
+    assert limiter.tokens.available == pytest.approx(750, abs=1)
+    assert limiter.total_wait == 0.0
+
+
+def test_limiters_are_shared_per_provider_and_key():
+    assert get_rate_limiter('Test', 'key', None, None) is None
+    shared = get_rate_limiter('Test', 'key-a', 60, None)
+    assert get_rate_limiter('Test', 'key-a', 60, None) is shared
+    assert get_rate_limiter('Test', 'key-b', 60, None) is not shared
+    assert get_rate_limiter('Other', 'key-a', 60, None) is not shared
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens('abcdefgh') == 2
+    assert estimate_tokens('客户满意') == 4
@@ -0,0 +1,116 @@
+"""
+Tests for retry classification, Retry-After handling and backoff
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.retry import (EmptyResponseError, RetryPolicy, call_with_retry, is_rate_limited, is_retryable,
+                          is_unsupported_response_format, retry_after)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message='', headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = type('Response', (), {'headers': headers or {}})()
+
+
+class RateLimitError(Exception):
+    """Named like the openai error, which is matched by class name"""
+
+
+def test_transient_errors_are_retryable():
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(EmptyResponseError())
+    assert is_retryable(RateLimitError())
+
+
+def test_client_and_config_errors_are_not_retryable():
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(ValueError("unsupported language"))
+    assert not is_retryable(KeyError('x'))
+
+
+def test_classification_follows_the_cause_chain():
+    try:
+        try:
+            raise StatusError(502)
+        except StatusError as e:
+            raise RuntimeError("Qwen API error") from e
+    except RuntimeError as e:
+        wrapped = e
+    assert is_retryable(wrapped)
+    assert not is_rate_limited(wrapped)
+
+
+def test_rate_limits_by_status_or_name():
+    assert is_rate_limited(StatusError(429))
+    assert is_rate_limited(RateLimitError())
+    assert not is_rate_limited(StatusError(500))
+
+
+def test_unsupported_response_format():
+    assert is_unsupported_response_format(StatusError(400, "Invalid parameter: response_format"))
+    assert is_unsupported_response_format(TypeError("unexpected keyword argument 'response_schema'"))
+    assert not is_unsupported_response_format(StatusError(400, "context length exceeded"))
+    assert not is_unsupported_response_format(StatusError(500, "response_format"))
+
+
+def test_retry_after_headers():
+    assert retry_after(StatusError(429, headers={'retry-after': '7'})) == 7.0
+    assert retry_after(StatusError(429, headers={'retry-after-ms': '1500', 'retry-after': '9'})) == 1.5
+    assert retry_after(StatusError(429)) is None
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after(StatusError(429, headers={'retry-after': format_datetime(when, usegmt=True)}))
+    assert 25 <= delay <= 30
+
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for attempt in range(8):
+        assert 0 <= policy.backoff(attempt) <= min(5.0, 2 ** attempt)
+
+
+def test_call_with_retry_waits_at_least_retry_after():
+    errors = [StatusError(429, headers={'retry-after': '3'}), StatusError(503)]
+    sleeps, seen = [], []
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    result, retries = call_with_retry(flaky, RetryPolicy(base_delay=0.01), sleep=sleeps.append, on_retry=seen.append)
+    assert (result, retries) == ('ok', 2)
+    assert sleeps[0] >= 3.0
+    assert len(seen) == 2
+
+
+def test_call_with_retry_gives_up():
+    def failing():
+        raise StatusError(500)
+
+    with pytest.raises(StatusError):
+        call_with_retry(failing, RetryPolicy(max_retries=2, base_delay=0), sleep=lambda _: None)
+
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        call_with_retry(bad_request, RetryPolicy(), sleep=lambda _: None)
+    assert len(calls) == 1
@@ -0,0 +1,64 @@
+"""
+Tests for one-pass reservoir and stratified sampling
+"""
+
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataloader import Dialogue, Language, Speaker, Utterance
+from sampling import reservoir_sample, sample_dialogues, satisfaction_stratum, stratified_sample
+
+
+def make_dialogues(n, satisfaction=lambda i: 1 + i % 5):
+    return [Dialogue([Utterance(Speaker.USER, f"dialogue {i}", None, [])], [satisfaction(i)], None,
+                     Language.ENGLISH, dialogue_id=i) for i in range(n)]
+
+
+def ids(dialogues):
+    return [d.dialogue_id for d in dialogues]
+
+
+def test_reservoir_is_seeded_and_in_stream_order():
+    dialogues = make_dialogues(200)
+    sample = reservoir_sample(iter(dialogues), 20, seed=7)
+    assert len(sample) == 20
+    assert ids(sample) == sorted(ids(sample))
+    assert ids(reservoir_sample(iter(dialogues), 20, seed=7)) == ids(sample)
+    assert ids(reservoir_sample(iter(dialogues), 20, seed=8)) != ids(sample)
+
+
+def test_reservoir_returns_everything_when_short():
+    dialogues = make_dialogues(5)
+    assert ids(reservoir_sample(dialogues, 10)) == ids(dialogues)
+
+
+def test_reservoir_is_roughly_uniform():
+    counts = Counter(i for seed in range(400) for i in ids(reservoir_sample(make_dialogues(10), 5, seed)))
+    assert all(130 <= counts[i] <= 270 for i in range(10))  # Expected 200 each
+
+
+def test_stratified_balances_satisfaction_bins():
+    # 90% of dialogues are in bin 5; a uniform sample would mostly be 5s
+    dialogues = make_dialogues(500, satisfaction=lambda i: 5 if i % 10 else 1 + i // 10 % 4)
+    sample = stratified_sample(iter(dialogues), 20, seed=1)
+    assert len(sample) == 20
+    assert ids(sample) == sorted(ids(sample))
+    assert Counter(satisfaction_stratum(d) for d in sample) == {1: 4, 2: 4, 3: 4, 4: 4, 5: 4}
+
+
+def test_stratified_gives_small_strata_leftover_to_large_ones():
+    dialogues = make_dialogues(100, satisfaction=lambda i: 1 if i < 2 else 3)
+    sample = stratified_sample(dialogues, 10, seed=3)
+    assert Counter(satisfaction_stratum(d) for d in sample) == {1: 2, 3: 8}
+
+
+def test_sample_dialogues_dispatch():
+    dialogues = make_dialogues(10)
+    assert sample_dialogues(dialogues, None) is dialogues
+    assert len(sample_dialogues(dialogues, 3, 'stratified')) == 3
+    with pytest.raises(ValueError):
+        sample_dialogues(dialogues, 3, 'systematic')
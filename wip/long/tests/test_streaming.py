@@ -0,0 +1,56 @@
+"""
+Tests for the incremental scanning of streamed JSON answers
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models.streaming import StreamingJSONScanner, read_stream
+
+CRITERIA = ['TaskSuccess', 'HelpfulnessRelevance']
+ANSWER = json.dumps({key: {"score": 80, "justification": "ok"} for key in CRITERIA})
+
+
+def chunked(text, size=3, index=0):
+    return ((index, text[i:i + size]) for i in range(0, len(text), size))
+
+
+def test_bracketed_prose_before_the_answer_is_skipped():
+    text = f"Here is the result [final]: {ANSWER} and some closing remarks"
+    result = read_stream(chunked(text), 1, CRITERIA)
+    assert result.cut_off
+    assert result.texts[0] == f"Here is the result [final]: {ANSWER}"
+
+
+def test_non_answer_objects_and_empty_arrays_are_skipped():
+    text = f"Scores {{see below}} in [] form:\n```json\n{ANSWER}\n```"
+    result = read_stream(chunked(text), 1, CRITERIA)
+    assert result.cut_off
+    assert result.texts[0].endswith(ANSWER)
+
+
+def test_literals_are_not_scores():
+    scanner = StreamingJSONScanner(CRITERIA)
+    scanner.feed('{"TaskSuccess": true, "HelpfulnessRelevance": {"score": null}}')
+    assert not scanner.scored
+    assert not scanner.complete
+
+
+def test_bare_and_negative_scores_count():
+    scanner = StreamingJSONScanner(CRITERIA)
+    scanner.feed('{"TaskSuccess": -5, "HelpfulnessRelevance": {"score": 1e2}}')
+    assert scanner.scores_complete
+    assert scanner.complete
+
+
+def test_batch_array_counts_scores_per_entry():
+    entries = [{"dialogue_id": i, **{key: i for key in CRITERIA}} for i in (1, 2)]
+    scanner = StreamingJSONScanner(CRITERIA, entries=2)
+    text = json.dumps(entries)
+    scanner.feed(text[:len(text) // 2])
+    assert not scanner.scores_complete
+    scanner.feed(text[len(text) // 2:])
+    assert scanner.scores_complete
+    assert scanner.complete